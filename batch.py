@@ -0,0 +1,206 @@
+'''
+batch.py
+Headless batch mode for the brochure generator (ollama/webscraper.py) and the website
+summarizer (openai/WebsiteSummarizer.py).
+
+Reads (company_name, url) rows from a CSV file with a header row or from JSONL, runs scraping
+and LLM generation on two separately sized worker pools, and appends one JSON line per finished
+job to the output file. Re-running with the same output file resumes: rows that already have a
+successful result are skipped.
+
+Usage:
+    python batch.py companies.csv results.jsonl --mode brochure --scrape-workers 8 --llm-workers 2
+    python batch.py urls.jsonl summaries.jsonl --mode summary
+    python batch.py companies.csv results.jsonl --crawl --max-depth 2 --max-pages 15
+
+With --crawl each site is crawled breadth-first (utils/crawler.py) instead of fetching the main
+page and its selected links. All scrape workers share one crawler, so its connection limit,
+per-host spacing and robots.txt cache hold across the whole batch.
+'''
+
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+
+
+def read_jobs(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    return [
+        {"company_name": (row.get("company_name") or "").strip(), "url": row["url"].strip()}
+        for row in rows if row.get("url")
+    ]
+
+
+# Keys of rows that already finished successfully in a previous run
+def read_done(path):
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # partial line from an interrupted run
+                if result.get("status") == "ok":
+                    done.add((result["company_name"], result["url"]))
+    return done
+
+
+class BrochureMode:
+    def __init__(self):
+        sys.path.append(os.path.join(ROOT, "ollama"))
+        import webscraper
+        self.app = webscraper
+
+    def scrape(self, job):
+        prompt = self.app.build_brochure_prompt(job["company_name"], job["url"])
+        if not prompt:
+            raise RuntimeError("Could not scrape website content")
+        return self.app.brochure_messages(prompt)
+
+    def generate(self, messages):
+        from utils import tracing
+        from utils.llm_cache import get_response_cache
+        model = self.app.MODEL
+        return get_response_cache().complete(
+            "ollama", model, messages,
+            lambda: tracing.ollama_chat(model, messages)["message"]["content"]
+        ).replace("```", "")
+
+
+class SummaryMode:
+    def __init__(self):
+        sys.path.append(os.path.join(ROOT, "openai"))
+        import WebsiteSummarizer
+        self.app = WebsiteSummarizer
+
+    def scrape(self, job):
+        website = self.app.CrawledSite if self.app.USE_CRAWLER else self.app.Website
+        return self.app.messages_for(website(job["url"]))
+
+    def generate(self, messages):
+        from utils.llm_cache import get_response_cache
+        model = self.app.MODEL
+        return get_response_cache().complete(
+            "openai", model, messages,
+            lambda: self.app.openai.chat.completions.create(model=model, messages=messages).choices[0].message.content
+        )
+
+
+MODES = {"brochure": BrochureMode, "summary": SummaryMode}
+
+
+class StageTimer:
+    def __init__(self):
+        self.totals = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+
+
+def timed(timer, stage, fn, *args):
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        timer.record(stage, time.perf_counter() - start)
+
+
+def run(jobs, mode, output_path, scrape_workers, llm_workers):
+    timer = StageTimer()
+    written = {"ok": 0, "error": 0}
+    started = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(scrape_workers, thread_name_prefix="scrape") as scrape_pool, \
+            ThreadPoolExecutor(llm_workers, thread_name_prefix="llm") as llm_pool:
+
+        def write(job, status, output=None, error=None):
+            result = {"company_name": job["company_name"], "url": job["url"], "status": status,
+                      "output": output, "error": error}
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            written[status] += 1
+            print(f"[{status}] {job['company_name'] or job['url']}", file=sys.stderr)
+
+        pending = {scrape_pool.submit(timed, timer, "scrape", mode.scrape, job): ("scrape", job) for job in jobs}
+        try:
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage, job = pending.pop(future)
+                    if future.exception():
+                        write(job, "error", error=f"{stage}: {future.exception()}")
+                    elif stage == "scrape":
+                        llm_future = llm_pool.submit(timed, timer, "llm", mode.generate, future.result())
+                        pending[llm_future] = ("llm", job)
+                    else:
+                        write(job, "ok", output=future.result())
+        except KeyboardInterrupt:
+            print("Interrupted; re-run with the same output file to resume.", file=sys.stderr)
+            scrape_pool.shutdown(wait=False, cancel_futures=True)
+            llm_pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    elapsed = time.perf_counter() - started
+    print(f"\n{written['ok']} ok, {written['error']} failed in {elapsed:.1f}s "
+          f"({sum(written.values()) / elapsed * 60:.1f} jobs/min)")
+    for stage in ("scrape", "llm"):
+        count = timer.counts.get(stage, 0)
+        if count:
+            total = timer.totals[stage]
+            print(f"  {stage:>6}: {count} jobs, {total:.1f}s busy, {total / count:.2f}s avg")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV (company_name,url header) or JSONL file of jobs")
+    parser.add_argument("output", help="JSONL results file; appended to and used for resuming")
+    parser.add_argument("--mode", choices=MODES, default="brochure")
+    parser.add_argument("--scrape-workers", type=int, default=8)
+    parser.add_argument("--llm-workers", type=int, default=2)
+    parser.add_argument("--crawl", action="store_true", help="crawl each site instead of fetching selected links")
+    parser.add_argument("--max-depth", type=int, help="crawl depth in links from the main page (default: the app's)")
+    parser.add_argument("--max-pages", type=int, help="pages kept per crawled site (default: the app's)")
+    args = parser.parse_args()
+
+    jobs = read_jobs(args.input)
+    done = read_done(args.output)
+    todo = [job for job in jobs if (job["company_name"], job["url"]) not in done]
+    print(f"{len(jobs)} jobs, {len(jobs) - len(todo)} already done, {len(todo)} to run", file=sys.stderr)
+    if not todo:
+        return
+    mode = MODES[args.mode]()
+    if args.crawl:
+        mode.app.USE_CRAWLER = True
+        if args.max_depth is not None:
+            mode.app.CRAWL_MAX_DEPTH = args.max_depth
+        if args.max_pages is not None:
+            mode.app.CRAWL_MAX_PAGES = args.max_pages
+    run(todo, mode, args.output, args.scrape_workers, args.llm_workers)
+    if args.crawl:
+        from utils.crawler import get_crawler
+        crawler = get_crawler()
+        totals = crawler.totals
+        print(f"  crawl: {crawler.requests} requests, {totals['pages']} pages kept, {totals['duplicates']} duplicates, "
+              f"{totals['failed']} failed, {totals['disallowed']} disallowed by robots.txt")
+
+
+if __name__ == "__main__":
+    main()
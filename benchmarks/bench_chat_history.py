@@ -0,0 +1,87 @@
+'''
+benchmarks/bench_chat_history.py
+Per-turn chat latency versus turn count, with an unbounded history (what OllamaChat used to send)
+and with utils/history.ChatHistory.
+
+Usage:
+    python benchmarks/bench_chat_history.py [--turns 40] [--budget 3000]
+    python benchmarks/bench_chat_history.py --host http://localhost:11434 --model gemma3:1b
+
+Without --host a local fake server is started whose prompt processing time grows with prompt
+length (--prefill-tokens-per-sec), which is the cost the history budget is meant to cap.
+'''
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ollama
+
+from utils.fake_llm_server import FakeLLMServer
+from utils.history import ChatHistory
+from utils.tokens import estimate_tokens
+
+QUESTION = "Tell me one more fact about the history of computing, and relate it to what you said before."
+
+
+class UnboundedHistory:
+    def __init__(self):
+        self._messages = []
+
+    def append(self, message):
+        self._messages.append(message)
+
+    def messages(self):
+        return list(self._messages)
+
+
+def run(client, model, history, turns):
+    latencies = []
+    prompt_tokens = []
+    for _ in range(turns):
+        history.append({"role": "user", "content": QUESTION})
+        messages = history.messages()
+        start = time.perf_counter()
+        answer = client.chat(model=model, messages=messages)["message"]["content"]
+        latencies.append(time.perf_counter() - start)
+        prompt_tokens.append(sum(estimate_tokens(m["content"]) for m in messages))
+        history.append({"role": "assistant", "content": answer})
+    return latencies, prompt_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", help="real Ollama server; default is a local fake server")
+    parser.add_argument("--model", default="fake")
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--budget", type=int, default=3000)
+    parser.add_argument("--prefill-tokens-per-sec", type=float, default=5000)
+    args = parser.parse_args()
+
+    host = args.host
+    if not host:
+        reply = "Computing history has many milestones worth describing in detail. " * 25
+        server = FakeLLMServer(reply=reply, prefill_tokens_per_sec=args.prefill_tokens_per_sec).start()
+        host = server.url
+    client = ollama.Client(host=host)
+
+    def complete(messages):
+        return client.chat(model=args.model, messages=messages)["message"]["content"]
+
+    unbounded = run(client, args.model, UnboundedHistory(), args.turns)
+    managed = run(client, args.model, ChatHistory(args.budget, complete), args.turns)
+
+    print(f"{'turn':>4} | {'unbounded s':>11} {'tokens':>7} | {'managed s':>9} {'tokens':>7}")
+    for turn in range(args.turns):
+        print(f"{turn + 1:>4} | {unbounded[0][turn]:>11.3f} {unbounded[1][turn]:>7} | "
+              f"{managed[0][turn]:>9.3f} {managed[1][turn]:>7}")
+    last = max(1, args.turns // 4)
+    print(f"\nMean latency over the last {last} turns: unbounded {sum(unbounded[0][-last:]) / last:.3f}s, "
+          f"managed {sum(managed[0][-last:]) / last:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+'''
+benchmarks/bench_extract.py
+Compare the single-pass extractor (utils/extract.py) with the original BeautifulSoup code path.
+
+Usage:
+    python benchmarks/bench_extract.py [CORPUS_DIR] [--repeat N]
+
+CORPUS_DIR holds saved .html pages (e.g. `curl -o site.html https://...`). Without it a synthetic
+corpus of large marketing-style pages is generated. Reports pages/s, MB/s and peak traced memory
+for each extractor, and checks that both produce the same text and links.
+'''
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.extract import extract_page
+
+
+# The Website extraction code as it was before utils/extract.py
+def extract_page_bs4(content):
+    soup = BeautifulSoup(content, 'html.parser')
+
+    title = soup.title.string.strip() if soup.title and soup.title.string else "No title found"
+
+    if soup.body:
+        for tag in soup.body(["script", "style", "img", "input", "noscript"]):
+            tag.decompose()
+        text = soup.body.get_text(separator="\n", strip=True)
+    else:
+        text = ""
+
+    raw_links = [link.get('href') for link in soup.find_all('a')]
+    links = [link for link in raw_links if link and not link.startswith("mailto:")]
+    return {"title": title, "text": text, "links": links}
+
+
+def synthetic_corpus(pages=20, sections=300):
+    corpus = []
+    for p in range(pages):
+        body = []
+        for i in range(sections):
+            body.append(
+                f'<section class="block-{i}"><h2>Feature {i}</h2>'
+                f'<p>Our platform helps teams ship faster &amp; safer. Paragraph {i} of page {p}.</p>'
+                f'<img src="/img/{i}.png" alt="feature"><a href="/features/{i}">Learn more</a>'
+                f'<script>window.track && track("view", {i});</script>'
+                f'<style>.block-{i} {{ color: #{i:06d}; }}</style></section>'
+            )
+        html = (
+            f'<!DOCTYPE html><html><head><title> Company page {p} </title>'
+            f'<script src="/app.js"></script></head><body><nav><a href="/">Home</a>'
+            f'<a href="/about">About</a><a href="mailto:hi@example.com">Mail</a></nav>'
+            f'{"".join(body)}<noscript>Enable JavaScript</noscript>'
+            f'<footer>&copy; Example Inc.</footer></body></html>'
+        )
+        corpus.append(html.encode("utf-8"))
+    return corpus
+
+
+def load_corpus(path):
+    corpus = []
+    for name in sorted(os.listdir(path)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(path, name), "rb") as f:
+                corpus.append(f.read())
+    return corpus
+
+
+# Timing runs without tracemalloc, which would slow both extractors down; peak memory is
+# taken from one separate traced pass
+def measure(extract, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for content in corpus:
+            extract(content)
+    elapsed = time.perf_counter() - start
+
+    peak = 0
+    for content in corpus:
+        tracemalloc.start()
+        extract(content)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", help="directory of saved .html files")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus()
+    if not corpus:
+        sys.exit("No .html files found in corpus directory")
+    total_bytes = sum(len(c) for c in corpus)
+
+    mismatches = sum(
+        1 for content in corpus
+        if extract_page(content)["text"] != extract_page_bs4(content)["text"]
+        or extract_page(content)["links"] != extract_page_bs4(content)["links"]
+    )
+    print(f"Corpus: {len(corpus)} pages, {total_bytes / 1e6:.2f} MB, repeat {args.repeat}")
+    print(f"Output mismatches vs BeautifulSoup: {mismatches}")
+
+    results = {}
+    for name, extract in (("bs4 html.parser", extract_page_bs4), ("single-pass", extract_page)):
+        elapsed, peak = measure(extract, corpus, args.repeat)
+        pages = len(corpus) * args.repeat
+        results[name] = elapsed
+        print(
+            f"{name:>16}: {pages / elapsed:8.1f} pages/s  {total_bytes * args.repeat / elapsed / 1e6:6.2f} MB/s"
+            f"  peak {peak / 1e6:7.2f} MB"
+        )
+    print(f"Speedup: {results['bs4 html.parser'] / results['single-pass']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+'''
+benchmarks/bench_markdown.py
+Rendering cost of a streamed brochure: markdown() over the whole answer for every delta (what
+stream_brochure used to do) versus utils/render.IncrementalMarkdown, with and without throttled
+updates.
+
+Usage:
+    python benchmarks/bench_markdown.py [--tokens 4000] [--tokens-per-sec 50] [--interval 0.1]
+
+The brochure is synthetic Markdown (headings, paragraphs, bullet and numbered lists, quotes)
+streamed one ~4-character token per delta. Throttled modes render when --interval seconds of
+stream time have passed at --tokens-per-sec, and once at the end. Reports the CPU time spent
+rendering, the slowest single update and the bytes of HTML sent to the client, and checks that
+every mode ends with the same HTML as rendering the final text once.
+'''
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from markdown import markdown
+
+from utils.render import IncrementalMarkdown
+from utils.tokens import estimate_tokens
+
+WORDS = ("analytics product teams customers platform data insight growth retention dashboard "
+         "pipeline experiment cohort funnel warehouse privacy engineering culture mission").split()
+
+
+def sentence(rng, words=12):
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def brochure(tokens, seed=1):
+    rng = random.Random(seed)
+    parts = ["# Acme Analytics\n\n"]
+    section = 0
+    while estimate_tokens("".join(parts)) < tokens:
+        section += 1
+        parts.append(f"## Section {section}: {rng.choice(WORDS).title()}\n\n")
+        parts.append(" ".join(sentence(rng) for _ in range(4)) + "\n\n")
+        parts.append("".join(f"- **{rng.choice(WORDS).title()}**: {sentence(rng, 8)}\n" for _ in range(4)) + "\n")
+        parts.append(" ".join(sentence(rng) for _ in range(3)) + "\n\n")
+        parts.append("".join(f"{i}. {sentence(rng, 6)}\n" for i in range(1, 4)) + "\n")
+        if section % 3 == 0:
+            parts.append(f"> {sentence(rng)}\n\n")
+        if section % 4 == 0:
+            parts.append("```\n")
+    return "".join(parts)
+
+
+def deltas(text, size=4):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def run(mode, chunks, tokens_per_sec, interval):
+    throttled = mode.endswith("throttled")
+    every = max(1, round(interval * tokens_per_sec)) if throttled else 1
+    incremental = IncrementalMarkdown(strip_fences=True) if mode.startswith("incremental") else None
+    response = ""
+    cpu = slowest = 0.0
+    sent = updates = 0
+    html = ""
+    for i, content in enumerate(chunks, 1):
+        started = time.process_time()
+        if incremental:
+            incremental.feed(content)
+        else:
+            response += content.replace("```", "")
+        if i % every == 0 or i == len(chunks):
+            html = incremental.html() if incremental else markdown(response)
+            sent += len(html)
+            updates += 1
+        elapsed = time.process_time() - started
+        cpu += elapsed
+        slowest = max(slowest, elapsed)
+    return {"cpu": cpu, "slowest": slowest, "updates": updates, "sent": sent, "html": html}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=4000)
+    parser.add_argument("--tokens-per-sec", type=float, default=50)
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between throttled updates")
+    args = parser.parse_args()
+
+    text = brochure(args.tokens)
+    chunks = deltas(text)
+    expected = markdown(text.replace("```", ""))
+    print(f"Brochure: {estimate_tokens(text)} tokens, {len(chunks)} deltas, {len(expected)} chars of HTML")
+    print(f"{'mode':>24} {'updates':>8} {'render CPU s':>13} {'slowest ms':>11} {'HTML sent MB':>13}  final")
+    for mode in ("full", "full throttled", "incremental", "incremental throttled"):
+        result = run(mode, chunks, args.tokens_per_sec, args.interval)
+        same = "same" if result["html"] == expected else "DIFFERENT"
+        print(f"{mode:>24} {result['updates']:>8} {result['cpu']:>13.3f} {result['slowest'] * 1000:>11.2f} "
+              f"{result['sent'] / 2 ** 20:>13.2f}  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+'''
+benchmarks/bench_pdf_extract.py
+Serial pdfplumber extraction (the notebook's old code path) versus utils/pdf_text.iter_pages.
+
+Usage:
+    python benchmarks/bench_pdf_extract.py [PDF] [--workers N] [--repeat N]
+
+Defaults to documents/attention-is-all-you-need-Paper.pdf. Each mode runs in a fresh Python
+process so peak RSS is not polluted by the other. Reports wall time, time to the first page and
+peak RSS of the main process and of the largest worker, with the page cache disabled, then the
+time of a second, cached run.
+'''
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pdfplumber
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from utils import pdf_text
+
+DEFAULT_PDF = os.path.join(ROOT, "documents", "attention-is-all-you-need-Paper.pdf")
+
+
+def serial(path):
+    started = time.perf_counter()
+    with pdfplumber.open(path) as pdf:
+        pages = []
+        for page in pdf.pages:
+            pages.append(page.extract_text() or "")
+            if len(pages) == 1:
+                first = time.perf_counter() - started
+        # Like the notebook: nothing is usable until every page is done
+        text = "\n".join(pages)
+    return text, first
+
+
+def parallel(path, workers, use_cache):
+    started = time.perf_counter()
+    pages = []
+    for _, page in pdf_text.iter_pages(path, workers=workers, use_cache=use_cache):
+        pages.append(page)
+        if len(pages) == 1:
+            first = time.perf_counter() - started
+    return "\n".join(pages), first
+
+
+def run_one(args):
+    # Child process: run one mode and print a JSON result line
+    started = time.perf_counter()
+    if args.run == "serial":
+        text, first = serial(args.pdf)
+    else:
+        text, first = parallel(args.pdf, args.workers, use_cache=args.run == "cached")
+    wall = time.perf_counter() - started
+    print(json.dumps({
+        "wall": wall,
+        "first_page": first,
+        "chars": len(text),
+        # ru_maxrss is in KiB on Linux
+        "rss_main": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "rss_worker": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }))
+
+
+def measure(args, mode, cache_dir):
+    command = [sys.executable, __file__, args.pdf, "--workers", str(args.workers), "--run", mode]
+    env = dict(os.environ, PDF_TEXT_CACHE_DIR=cache_dir)
+    results = []
+    for _ in range(args.repeat):
+        output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.splitlines()[-1]))
+    return min(results, key=lambda r: r["wall"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", nargs="?", default=DEFAULT_PDF)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--run", choices=["serial", "parallel", "cached"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_one(args)
+        return
+
+    cache_dir = tempfile.mkdtemp()
+    results = {
+        "serial": measure(args, "serial", cache_dir),
+        f"parallel x{args.workers}": measure(args, "parallel", cache_dir),
+    }
+    # Fill the cache once, then time runs that only read it
+    measure(argparse.Namespace(**{**vars(args), "repeat": 1}), "cached", cache_dir)
+    results["cached"] = measure(args, "cached", cache_dir)
+
+    with pdfplumber.open(args.pdf) as pdf:
+        pages = len(pdf.pages)
+    print(f"{os.path.basename(args.pdf)}: {pages} pages, best of {args.repeat}")
+    print(f"{'':>12} | {'wall':>7} | {'1st page':>8} | {'RSS main':>8} | {'RSS worker':>10} | {'chars':>7}")
+    for name, r in results.items():
+        print(f"{name:>12} | {r['wall']:>6.2f}s | {r['first_page']:>7.2f}s | {r['rss_main']:>5.0f} MB"
+              f" | {r['rss_worker']:>7.0f} MB | {r['chars']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+'''
+benchmarks/bench_vision_payload.py
+Request size and time-to-first-token for OllamaVision, sending the original file (the old
+behaviour) versus the preprocessed payload from utils/images.prepare_image.
+
+Usage:
+    python benchmarks/bench_vision_payload.py [--image photo.jpg] [--questions 5]
+    python benchmarks/bench_vision_payload.py --host http://localhost:11434 --model llava
+
+Without --image a 4000x3000 synthetic photo is generated. Without --host a local fake server is
+used, which measures upload and request handling but not the model's image encoder.
+'''
+
+import argparse
+import base64
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from utils import images
+from utils.fake_llm_server import FakeLLMServer
+from utils.llm_client import OllamaBackend, stream_chat
+
+
+def synthetic_photo(path):
+    noise = Image.effect_noise((4000, 3000), 64).convert("RGB")
+    gradient = Image.linear_gradient("L").resize((4000, 3000)).convert("RGB")
+    Image.blend(noise, gradient, 0.5).save(path, quality=95)
+
+
+def time_to_first_token(backend, model, payload):
+    started = time.perf_counter()
+    stream = stream_chat(backend, model, [{"role": "user", "content": "Describe this image.", "images": [payload]}])
+    first = None
+    for _ in stream:
+        if first is None:
+            first = time.perf_counter() - started
+    return first
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image")
+    parser.add_argument("--host", help="real Ollama server; default is a local fake server")
+    parser.add_argument("--model", default="fake")
+    parser.add_argument("--questions", type=int, default=5, help="follow-up questions about the same image")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    images.CACHE_DIR = os.path.join(workdir, "cache")
+    path = args.image
+    if not path:
+        path = os.path.join(workdir, "photo.jpg")
+        synthetic_photo(path)
+
+    host = args.host or FakeLLMServer().start().url
+    backend = OllamaBackend(host=host)
+
+    # Before: every question re-reads and base64-encodes the whole file
+    before_prep, before_ttft = [], []
+    for _ in range(args.questions):
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            payload = base64.b64encode(f.read()).decode("utf-8")
+        before_prep.append(time.perf_counter() - start)
+        before_ttft.append(time_to_first_token(backend, args.model, payload))
+    before_size = len(payload)
+
+    # After: preprocess once, then every follow-up reuses the cached payload
+    after_prep, after_ttft = [], []
+    for _ in range(args.questions):
+        start = time.perf_counter()
+        prepared = images.prepare_image(path)
+        after_prep.append(time.perf_counter() - start)
+        after_ttft.append(time_to_first_token(backend, args.model, prepared.payload))
+
+    print(f"Image: {path} ({os.path.getsize(path) / 1e6:.1f} MB), {args.questions} questions, server {host}")
+    print(f"{'':>8} | {'payload':>10} | {'prep 1st':>8} {'prep next':>9} | {'TTFT 1st':>8} {'TTFT avg':>8}")
+    for name, size, prep, ttft in (("before", before_size, before_prep, before_ttft),
+                                   ("after", prepared.payload_bytes, after_prep, after_ttft)):
+        print(f"{name:>8} | {size / 1024:>7.0f} KB | {prep[0]:>7.3f}s {sum(prep[1:]) / max(1, len(prep) - 1):>8.4f}s"
+              f" | {ttft[0]:>7.3f}s {sum(ttft) / len(ttft):>7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
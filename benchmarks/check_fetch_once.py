@@ -0,0 +1,85 @@
+'''
+benchmarks/check_fetch_once.py
+Checks that a brochure job downloads each URL at most once.
+
+Usage:
+    python benchmarks/check_fetch_once.py [--crawl]
+
+Starts the fake LLM server (utils/fake_llm_server.py) and the fixture site server
+(utils/fixture_server.py), runs ollama/webscraper.stream_brochure once with an empty page cache,
+and reads the fixture server's per-path request counts. Exits with status 1 and lists the paths
+if any of them was requested more than once. --crawl runs the job in crawl mode (USE_CRAWLER).
+
+The fixture's main page links to /about/ and #top besides /about, and the fake model's link
+answer repeats them; those variants must not cost GETs of their own. Its links are clear enough
+for the heuristic alone, so the check turns the heuristic's confidence off to make link
+selection go through the model.
+'''
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from utils.fake_llm_server import FakeLLMServer
+from utils.fixture_server import FixtureServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--crawl", action="store_true", help="build the prompt from a crawl of the site")
+    args = parser.parse_args()
+
+    site = FixtureServer().start()
+    links = {"links": [{"type": f"{name} page", "url": f"{site.url}/{name}"}
+                       for name in ("about", "products", "customers", "careers", "about/", "#top")]}
+
+    asked = []
+
+    def reply(messages):
+        if messages and "list of links" in messages[0].get("content", ""):
+            asked.append(True)
+            return json.dumps(links)
+        return "# Acme brochure"
+
+    llm = FakeLLMServer(reply=reply).start()
+
+    # The app reads these when it is imported
+    workdir = tempfile.mkdtemp()
+    os.environ["OLLAMA_HOST"] = llm.url
+    os.environ["LLM_CACHE"] = "off"
+    os.environ["PAGE_CACHE_PATH"] = os.path.join(workdir, "pages.sqlite3")
+    os.environ["RETRIEVAL_INDEX_DIR"] = os.path.join(workdir, "index")
+    sys.path.append(os.path.join(ROOT, "ollama"))
+
+    import webscraper
+    webscraper.MODEL = "fake"
+    webscraper.USE_CRAWLER = args.crawl
+    webscraper.CONFIDENT_TYPES = len(webscraper.LINK_TYPES) + 1  # always ask the model
+
+    last = ""
+    for last in webscraper.stream_brochure("Acme", site.url + "/"):
+        pass
+    if last.startswith("Error") or not site.counts:
+        print(f"Brochure job failed: {last}")
+        sys.exit(1)
+
+    problems = [f"{path} fetched {count} times" for path, count in sorted(site.counts.items()) if count > 1]
+    if not args.crawl:
+        if not asked:
+            problems.append("link selection did not ask the model")
+        problems += [f"{path} was not fetched" for path in ("/", "/about", "/products", "/customers", "/careers")
+                     if path not in site.counts]
+        problems += [f"{path} got a GET of its own" for path in ("/about/", "/#top") if path in site.counts]
+    print(f"{site.requests} requests for {len(site.counts)} paths")
+    for problem in problems:
+        print(f"  {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+'''
+benchmarks/loadtest.py
+Load test for the brochure generator, the website summarizer and the chat streaming path.
+
+Usage:
+    python benchmarks/loadtest.py [--users 8] [--requests 40] [--tokens-per-sec 100]
+    python benchmarks/loadtest.py --output after.json --baseline before.json
+
+Starts a fake Ollama/OpenAI server (utils/fake_llm_server.py) and a static server for the saved
+site in benchmarks/fixtures/site (utils/fixture_server.py), then drives
+ollama/webscraper.stream_brochure, openai/WebsiteSummarizer.summarize_stream and
+ChatHistory + stream_chat (what OllamaChat does per question) with --users concurrent clients.
+
+Reports p50/p95/p99 time to first token, total latency and tokens/s per request, scraping time
+per page and peak RSS for each scenario, and writes them to a JSON file. With --baseline the
+p50/p95 numbers are compared with an earlier result file and regressions are flagged.
+The LLM response cache is off and the page cache starts empty, so every run measures the same
+work.
+'''
+
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from utils.fake_llm_server import DEFAULT_REPLY, FakeLLMServer
+from utils.fixture_server import FixtureServer
+from utils.serving import Progress
+
+REPLY = DEFAULT_REPLY * 8
+REGRESSION_THRESHOLD = 0.10  # flag p50/p95 changes worse than 10%
+
+
+def percentiles(values):
+    """Nearest-rank p50/p95/p99 of values, or None for an empty list."""
+    if not values:
+        return None
+    values = sorted(values)
+    return {f"p{p}": values[max(0, math.ceil(p / 100 * len(values)) - 1)] for p in (50, 95, 99)}
+
+
+class RssSampler:
+    """Peak resident memory of this process while it runs, sampled from /proc every 20 ms."""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    @staticmethod
+    def current():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            # No /proc: fall back to the lifetime peak (KiB on Linux, bytes on macOS)
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if platform.system() == "Darwin" else peak * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self.peak = self.current()
+        threading.Thread(target=self._run, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        return self.peak
+
+
+class ScrapeTimer:
+    """Wraps an app's Website class to record how long each page takes to fetch and extract."""
+
+    def __init__(self, website_class):
+        self.durations = []
+        timer = self
+
+        class TimedWebsite(website_class):
+            def __init__(self, url):
+                started = time.perf_counter()
+                try:
+                    super().__init__(url)
+                finally:
+                    timer.durations.append(time.perf_counter() - started)
+
+        self.website_class = TimedWebsite
+
+
+def run_scenario(name, request, users, requests, scrape_timer=None):
+    """Call request(i) for i in range(requests) from users threads; each returns an output iterator."""
+    def one(i):
+        started = time.perf_counter()
+        first = None
+        tokens = 0
+        last = ""
+        try:
+            for last in request(i):
+                # Queue positions and stage names are not part of the answer
+                if isinstance(last, Progress):
+                    continue
+                if first is None:
+                    first = time.perf_counter() - started
+                tokens += 1
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+        if first is None or str(last).startswith("Error"):
+            return {"error": str(last) or "no output"}
+        latency = time.perf_counter() - started
+        generating = latency - first
+        return {
+            "ttft": first,
+            "latency": latency,
+            "tokens": tokens,
+            "tokens_per_sec": (tokens - 1) / generating if tokens > 1 and generating > 0 else None,
+        }
+
+    if scrape_timer:
+        scrape_timer.durations.clear()
+    sampler = RssSampler().start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(users) as pool:
+        results = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+    peak = sampler.stop()
+
+    ok = [r for r in results if "error" not in r]
+    errors = [r["error"] for r in results if "error" in r]
+    summary = {
+        "requests": requests,
+        "errors": len(errors),
+        "wall_sec": wall,
+        "requests_per_sec": requests / wall,
+        "ttft_sec": percentiles([r["ttft"] for r in ok]),
+        "latency_sec": percentiles([r["latency"] for r in ok]),
+        "tokens_per_sec": percentiles([r["tokens_per_sec"] for r in ok if r["tokens_per_sec"]]),
+        "peak_rss_mb": peak / 2 ** 20,
+    }
+    if scrape_timer:
+        summary["pages_scraped"] = len(scrape_timer.durations)
+        summary["scrape_sec_per_page"] = percentiles(scrape_timer.durations)
+    if errors:
+        summary["first_error"] = errors[0]
+    print_scenario(name, summary)
+    return summary
+
+
+def print_scenario(name, s):
+    def fmt(stats, unit="s"):
+        if not stats:
+            return "-"
+        return " / ".join(f"{stats[p]:.3f}" if unit == "s" else f"{stats[p]:.0f}" for p in ("p50", "p95", "p99"))
+
+    print(f"\n{name}: {s['requests']} requests, {s['errors']} errors, {s['requests_per_sec']:.1f} req/s, "
+          f"peak RSS {s['peak_rss_mb']:.0f} MB")
+    print(f"  TTFT p50/p95/p99      {fmt(s['ttft_sec'])} s")
+    print(f"  latency p50/p95/p99   {fmt(s['latency_sec'])} s")
+    print(f"  tokens/s p50/p95/p99  {fmt(s['tokens_per_sec'], 'n')}")
+    if "scrape_sec_per_page" in s:
+        print(f"  scrape/page p50/p95/p99 {fmt(s['scrape_sec_per_page'])} s ({s['pages_scraped']} pages)")
+    if "first_error" in s:
+        print(f"  first error: {s['first_error']}")
+
+
+def compare(results, baseline):
+    """Print p50/p95 changes against a baseline result file; returns the number of regressions."""
+    regressions = 0
+    print(f"\nCompared with {baseline['timestamp']}:")
+    for name, scenario in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        for metric, higher_is_better in (("ttft_sec", False), ("latency_sec", False), ("tokens_per_sec", True),
+                                         ("scrape_sec_per_page", False)):
+            for p in ("p50", "p95"):
+                old = (before.get(metric) or {}).get(p)
+                new = (scenario.get(metric) or {}).get(p)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                worse = -change if higher_is_better else change
+                flag = "REGRESSION" if worse > REGRESSION_THRESHOLD else ""
+                regressions += bool(flag)
+                print(f"  {name:>8} {metric:>20} {p}: {old:9.3f} -> {new:9.3f} ({change:+.0%}) {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=40, help="requests per scenario")
+    parser.add_argument("--scenarios", default="brochure,summary,chat")
+    parser.add_argument("--tokens-per-sec", type=float, default=100)
+    parser.add_argument("--first-token-latency", type=float, default=0.2)
+    parser.add_argument("--site-latency", type=float, default=0.02, help="seconds added to every fixture page")
+    parser.add_argument("--chat-turns", type=int, default=4, help="questions per chat session")
+    parser.add_argument("--output", default="loadtest-results.json")
+    parser.add_argument("--baseline", help="earlier result file to compare with")
+    args = parser.parse_args()
+
+    site = FixtureServer(latency=args.site_latency).start()
+    links = {"links": [{"type": f"{name} page", "url": f"{site.url}/{name}"}
+                       for name in ("about", "products", "customers", "careers")]}
+
+    def reply(messages):
+        # The brochure's link selection gets the fixture's pages, everything else the long reply
+        if messages and "list of links" in messages[0].get("content", ""):
+            return json.dumps(links)
+        return REPLY
+
+    llm = FakeLLMServer(reply=reply, tokens_per_sec=args.tokens_per_sec,
+                        first_token_latency=args.first_token_latency).start()
+
+    # The apps read these when they are imported
+    workdir = tempfile.mkdtemp()
+    os.environ["OLLAMA_HOST"] = llm.url
+    os.environ["LLM_CACHE"] = "off"
+    os.environ["PAGE_CACHE_PATH"] = os.path.join(workdir, "pages.sqlite3")
+    os.environ["RETRIEVAL_INDEX_DIR"] = os.path.join(workdir, "index")
+    sys.path.append(os.path.join(ROOT, "ollama"))
+    sys.path.append(os.path.join(ROOT, "openai"))
+
+    import ollama
+
+    from utils.history import ChatHistory
+    from utils.llm_client import OllamaBackend, OpenAIBackend, stream_chat
+
+    print(f"Fake LLM {llm.url} ({args.tokens_per_sec:g} tok/s, {args.first_token_latency:g}s to first token), "
+          f"fixture site {site.url}, {args.users} users")
+    scenarios = {}
+    wanted = args.scenarios.split(",")
+
+    if "brochure" in wanted:
+        import webscraper
+        timer = ScrapeTimer(webscraper.Website)
+        webscraper.Website = timer.website_class
+        webscraper.MODEL = "fake"
+        webscraper.UPDATE_INTERVAL = 0  # one output per token, so tokens/s stays comparable
+        scenarios["brochure"] = run_scenario(
+            "brochure", lambda i: webscraper.stream_brochure(f"Acme {i}", site.url + "/"),
+            args.users, args.requests, timer
+        )
+
+    if "summary" in wanted:
+        import WebsiteSummarizer
+        timer = ScrapeTimer(WebsiteSummarizer.Website)
+        WebsiteSummarizer.Website = timer.website_class
+        WebsiteSummarizer.MODEL = "fake"
+        WebsiteSummarizer.UPDATE_INTERVAL = 0
+        WebsiteSummarizer.backend = OpenAIBackend(api_key="fake", base_url=f"{llm.url}/v1")
+        pages = ["", "about", "products", "customers", "careers", "blog"]
+        scenarios["summary"] = run_scenario(
+            "summary", lambda i: WebsiteSummarizer.summarize_stream(f"{site.url}/{pages[i % len(pages)]}"),
+            args.users, args.requests, timer
+        )
+
+    if "chat" in wanted:
+        backend = OllamaBackend(host=llm.url)
+        client = ollama.Client(host=llm.url)
+        question = "Tell me one more fact about the history of computing."
+
+        def chat_turn(i):
+            # Request i is question (i % chat_turns + 1) of a conversation, with the earlier turns in history
+            history = ChatHistory(3000, lambda m: client.chat(model="fake", messages=m)["message"]["content"])
+            for _ in range(i % args.chat_turns):
+                history.append({"role": "user", "content": question})
+                history.append({"role": "assistant", "content": REPLY})
+            history.append({"role": "user", "content": question})
+            stream = stream_chat(backend, "fake", history.messages())
+            try:
+                yield from stream
+            finally:
+                stream.close()
+
+        scenarios["chat"] = run_scenario("chat", chat_turn, args.users, args.requests)
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "scenarios": scenarios,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f))
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,31 +3,51 @@ Ollama Chat Application
 OllamaChat.py - A simple GUI application to interact with the Ollama chat model.
 This application allows users to input questions and receive answers from the Ollama model.'''
 
-import ollama
+import os
+import sys
 import tkinter as tk
 from tkinter import ttk
-import re
+import queue
 import threading
+import time
+
+# Make the shared utils package importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import tracing
+from utils.history import ChatHistory
+from utils.llm_client import OllamaBackend
+from utils.models import ModelWarmup, show_warmup_progress
+from utils.reasoning import ThinkFilter, split_think
+from utils.routing import Route, stream_routed
 
 OLLAMA_API = "http://localhost:11434/api/chat" # Ollama API endpoint
 MODEL = "gemma3:1b"
 #MODEL = "deepseek-r1:1.5b"
 
-conversation_history = []
+# Speculative routing: with STRONG_MODEL set, every question also goes to that model. The first
+# answer to start is shown; the strong one replaces a fast answer if it starts within
+# SWITCH_WINDOW seconds, and the loser is cancelled. `python -m utils.routing` shows the stats.
+STRONG_MODEL = None  # e.g. "deepseek-r1:1.5b"
+SWITCH_WINDOW = 2.0
+route = Route(MODEL, STRONG_MODEL, SWITCH_WINDOW)
 
-def ensure_model_available(model_name):
-    try:
-        # Get list of all models already pulled
-        existing_models = [model['model'] for model in ollama.list()['models']]
-        if model_name not in existing_models:
-            print(f"Model '{model_name}' not found. Pulling now...")
-            ollama.pull(model=model_name)
-            print(f"Model '{model_name}' pulled successfully.")
-    except Exception as e:
-        print(f"Failed to ensure model availability: {e}")
+# Prompt tokens kept for the conversation; older turns are folded into a summary
+HISTORY_TOKEN_BUDGET = 3000
 
+backend = OllamaBackend()
+conversation_history = ChatHistory(
+    HISTORY_TOKEN_BUDGET,
+    lambda messages: split_think(tracing.ollama_chat(MODEL, messages)["message"]["content"])[1]
+)
+active_stream = None  # stream being displayed, cancelled by remove_all
+answer_generation = 0  # bumped by remove_all so late deltas from a cleared chat are dropped
 
-ensure_model_available(MODEL)
+# Reasoning models' <think> blocks are shown separately and never resent with the history
+reasoning_tokens = 0     # reasoning tokens kept out of the history this session
+prompt_tokens_saved = 0  # ...summed over every request sent since, i.e. prompt tokens not resent
+
+FRAME_INTERVAL_MS = 33  # redraw the answer at most ~30 times per second while streaming
 
 def handle_keypress(event):
     if event.state & 0x1:  # Check if Shift is pressed
@@ -52,8 +72,8 @@ def display_answer(event=None):
         # Pass the entire conversation history to Ollama
         try:
             # Get the answer
-            response = ollama.chat(model=MODEL, messages=conversation_history)
-            answer = response["message"]["content"]
+            response = tracing.ollama_chat(MODEL, conversation_history.messages())
+            _, answer = split_think(response["message"]["content"])
 
             # Append the assistant's answer to the conversation history
             conversation_history.append({"role": "assistant", "content": answer})
@@ -85,64 +105,205 @@ def display_answer(event=None):
     root.update()
 	
 def display_answer_stream(event=None):
-    def run_chat():
-        question_text['state'] = 'disabled'
-        question_text['bg'] = '#F0F0F0'
-        status_label.config(text="Looking for an answer...")
-        root.update()
-
-        question = question_text.get("1.0", tk.END).strip()
-        if question:
-            conversation_history.append({"role": "user", "content": question})
-
-            try:
-                answer_text.configure(state='normal')
-                answer_text.delete(1.0, tk.END)
-
-                response_stream = ollama.chat(
-                    model=MODEL,
-                    messages=conversation_history,
-                    stream=True
-                )
-
-                full_response = ""
-                for chunk in response_stream:
-                    delta = chunk.get("message", {}).get("content", "")
-                    delta = re.sub(r'</?think>', '', delta)
-                    full_response += delta
-                    answer_text.insert(tk.END, delta)
-                    answer_text.see(tk.END)
-                    answer_text.update()
-
-                conversation_history.append({"role": "assistant", "content": full_response})
-
-                answer_text.configure(state='disabled')
-                status_label.config(text="Answered")
-            except Exception as e:
-                answer_text.configure(state='normal')
-                answer_text.delete(1.0, tk.END)
-                answer_text.insert(tk.END, f"Error: {str(e)}")
-                answer_text.configure(state='disabled')
-                status_label.config(text="Error")
+    global prompt_tokens_saved
+    question = question_text.get("1.0", tk.END).strip()
+    question_text['state'] = 'disabled'
+    question_text['bg'] = '#F0F0F0'
+
+    if not question:
+        answer_text.configure(state='normal')
+        answer_text.delete(1.0, tk.END)
+        answer_text.insert(tk.END, "Please enter a question.")
+        answer_text.configure(state='disabled')
+        status_label.config(text="")
+        finish_question()
+        return
+
+    status_label.config(text="Looking for an answer...")
+    conversation_history.append({"role": "user", "content": question})
+    prompt_tokens_saved += reasoning_tokens
+    answer_text.configure(state='normal')
+    answer_text.delete(1.0, tk.END)
+    set_reasoning("")
+
+    # The worker only talks to the model; all widget updates happen on the Tk main loop
+    updates = queue.Queue()
+    threading.Thread(target=stream_worker, args=(conversation_history.messages(), updates), daemon=True).start()
+    root.after(FRAME_INTERVAL_MS, drain_answer_updates, updates, RenderStats(), answer_generation)
+
+
+def stream_worker(messages, updates):
+    global active_stream
+    trace = tracing.start_trace("chat", route=route.name, messages=len(messages))
+    try:
+        with trace.activate():
+            response_stream = stream_routed(backend, route, messages)
+        active_stream = response_stream
+
+        parts = []
+        think = ThinkFilter()
+        for kind, delta in response_stream:
+            if kind == "switch":
+                # The strong model took over: its answer so far replaces the fast one
+                think = ThinkFilter()
+                reasoning, answer = think.feed(delta)
+                parts = [answer]
+                updates.put(("switch", (response_stream.model, reasoning, answer)))
+                continue
+            reasoning, answer = think.feed(delta)
+            if reasoning:
+                updates.put(("reasoning", reasoning))
+            if answer:
+                parts.append(answer)
+                updates.put(("delta", answer))
+        reasoning, answer = think.flush()
+        if reasoning:
+            updates.put(("reasoning", reasoning))
+        if answer:
+            parts.append(answer)
+            updates.put(("delta", answer))
+
+        # A stream cancelled by "Remove All" belongs to a cleared conversation
+        answer = "".join(parts) if response_stream.completed else None
+        updates.put(("done", (answer, response_stream.model, think.reasoning_tokens)))
+    except Exception as e:
+        updates.put(("error", e))
+    finally:
+        trace.finish()
+
+
+# Runs on the Tk main loop every FRAME_INTERVAL_MS while an answer streams in,
+# inserting everything that arrived since the last frame in one go
+def drain_answer_updates(updates, stats, generation):
+    global reasoning_tokens
+    batch = []
+    reasoning = []
+    replace = False
+    finished = None
+    while finished is None:
+        try:
+            kind, value = updates.get_nowait()
+        except queue.Empty:
+            break
+        if kind == "delta":
+            batch.append(value)
+        elif kind == "reasoning":
+            reasoning.append(value)
+        elif kind == "switch":
+            model, thought, text = value
+            batch = [text]
+            reasoning = [thought]
+            replace = True
+            status_label.config(text=f"Switched to {model}...")
         else:
-            answer_text.configure(state='normal')
-            answer_text.delete(1.0, tk.END)
-            answer_text.insert(tk.END, "Please enter a question.")
-            answer_text.configure(state='disabled')
-            status_label.config(text="")
+            finished = (kind, value)
 
-        # Clear the question box after processing
-        question_text['state'] = 'normal'
-        question_text.delete(1.0, tk.END)  # <-- Add this line
-        question_text['bg'] = 'white'
-        root.update()
+    # Deltas from a conversation cleared by "Remove All" are dropped
+    current = generation == answer_generation
+    if replace and current:
+        answer_text.delete(1.0, tk.END)
+        set_reasoning("")
+    if reasoning and current:
+        append_reasoning("".join(reasoning))
+    if batch and current:
+        answer_text.insert(tk.END, "".join(batch))
+        answer_text.see(tk.END)
+        stats.record_frame(len(batch))
+
+    if finished is None:
+        root.after(FRAME_INTERVAL_MS, drain_answer_updates, updates, stats, generation)
+        return
+
+    kind, value = finished
+    # A question left without an answer would make the next request send two user turns in a row
+    if current and (kind == "error" or value[0] is None):
+        conversation_history.drop_question()
+    if kind == "error":
+        answer_text.configure(state='normal')
+        answer_text.delete(1.0, tk.END)
+        answer_text.insert(tk.END, f"Error: {str(value)}")
+        status_label.config(text="Error")
+    elif value[0] is not None and current:
+        answer, model, thought_tokens = value
+        conversation_history.append({"role": "assistant", "content": answer})
+        reasoning_tokens += thought_tokens
+        answered_by = f" by {model}" if STRONG_MODEL else ""
+        status = f"Answered{answered_by} ({stats.summary()})"
+        if reasoning_tokens:
+            status += (f"\nReasoning kept out of history: {thought_tokens} tokens; "
+                       f"{prompt_tokens_saved} prompt tokens saved this session")
+        status_label.config(text=status)
+    answer_text.configure(state='disabled')
+    finish_question()
+
+
+# Clear the question box and accept the next question
+def finish_question():
+    question_text['state'] = 'normal'
+    question_text.delete(1.0, tk.END)
+    question_text['bg'] = 'white'
+
+
+class RenderStats:
+    """Counts chunks and redraws for one streamed answer, so the render rate can be checked."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.chunks = 0
+        self.frames = 0
+
+    def record_frame(self, chunks):
+        self.chunks += chunks
+        self.frames += 1
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return f"{self.chunks} chunks in {self.frames} redraws, {self.frames / elapsed:.0f} redraws/s"
+
+# Reasoning view: collapsed behind a toggle, filled while the model thinks
+def set_reasoning(text):
+    reasoning_text.configure(state='normal')
+    reasoning_text.delete(1.0, tk.END)
+    reasoning_text.configure(state='disabled')
+    if text:
+        append_reasoning(text)
+    else:
+        reasoning_button.config(text=reasoning_button_label())
+
+
+def append_reasoning(text):
+    reasoning_text.configure(state='normal')
+    reasoning_text.insert(tk.END, text)
+    reasoning_text.see(tk.END)
+    reasoning_text.configure(state='disabled')
+    reasoning_button.config(text=reasoning_button_label())
+
+
+def reasoning_button_label():
+    shown = reasoning_text.winfo_ismapped()
+    size = len(reasoning_text.get(1.0, "end-1c"))
+    return f"{'Hide' if shown else 'Show'} reasoning ({size} chars)" if size else "No reasoning"
+
+
+def toggle_reasoning():
+    if reasoning_text.winfo_ismapped():
+        reasoning_text.pack_forget()
+    else:
+        reasoning_text.pack(fill="x", pady=(0, 5), before=text_frame)
+    root.update_idletasks()
+    reasoning_button.config(text=reasoning_button_label())
 
-    threading.Thread(target=run_chat).start()
 
 def remove_all():
     """Clears the conversation history and resets the interface."""
-    global conversation_history
-    conversation_history = []  # Clear conversation history
+    global answer_generation, reasoning_tokens, prompt_tokens_saved
+    conversation_history.clear()  # Clear conversation history
+    answer_generation += 1
+    reasoning_tokens = prompt_tokens_saved = 0
+
+    # Stop any answer still streaming
+    if active_stream:
+        active_stream.close()
 
     # Reset text widgets
     question_text.delete(1.0, tk.END)
@@ -150,6 +311,7 @@ def remove_all():
     answer_text.delete(1.0, tk.END)
     answer_text.insert(tk.END, "Your answer will appear here.")
     answer_text.configure(state='disabled')
+    set_reasoning("")
 
     # Reset status label
     status_label.config(text="")
@@ -183,6 +345,12 @@ remove_all_button.pack(anchor="e", pady=5)
 answer_frame = ttk.LabelFrame(root, text="Answer", padding=(10, 10))
 answer_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
+# Reasoning of thinking models, hidden until the toggle is pressed
+reasoning_button = ttk.Button(answer_frame, text="No reasoning", command=toggle_reasoning)
+reasoning_button.pack(anchor="w", pady=(0, 5))
+reasoning_text = tk.Text(answer_frame, wrap=tk.WORD, width=70, height=8, fg="#666666", bg="#F7F7F7")
+reasoning_text.configure(state='disabled')
+
 # Create a frame to hold the text widget and scrollbar
 text_frame = ttk.Frame(answer_frame)
 text_frame.pack(fill="both", expand=True)
@@ -200,5 +368,13 @@ scrollbar.pack(side="right", fill="y")
 answer_text.insert(tk.END, "Your answer will appear here.")
 answer_text.configure(state='disabled')
 
+tracing.init_from_env()
+
+# Check, pull and preload the model in the background while the window is already usable
+warmup = ModelWarmup(MODEL).start()
+if STRONG_MODEL:
+    ModelWarmup(STRONG_MODEL).start()
+show_warmup_progress(root, warmup, lambda text: status_label.config(text=text))
+
 # Run the main event loop
 root.mainloop()
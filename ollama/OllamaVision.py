@@ -3,72 +3,114 @@ Ollama Vision Chat Application
 This application allows users to upload an image and ask questions about it using the Ollama Vision model
 '''
 
+import os
+import sys
 import tkinter as tk
 from tkinter import filedialog
 from PIL import Image, ImageTk
-import base64
-import ollama
+import queue
 import threading
+import time
 
-MODEL = "llava"
+# Make the shared utils package importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def encode_image_base64(image_path):
-    with open(image_path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
+from utils.images import prepare_image
+from utils.llm_client import OllamaBackend, stream_chat
+from utils.models import ModelWarmup, show_warmup_progress
+from utils.vision_session import VisionSession
 
-def ensure_model_available(model_name):
-    try:
-        # Get list of all models already pulled
-        existing_models = [model['model'] for model in ollama.list()['models']]
-        if model_name not in existing_models:
-            print(f"Model '{model_name}' not found. Pulling now...")
-            ollama.pull(model=model_name)
-            print(f"Model '{model_name}' pulled successfully.")
-    except Exception as e:
-        print(f"Failed to ensure model availability: {e}")
+MODEL = "llava"
+backend = OllamaBackend()
+session = VisionSession()
+
+FRAME_INTERVAL_MS = 33  # how often queued UI updates from the worker are applied
+active_stream = None  # stream being displayed, cancelled by new_session
+answer_generation = 0  # bumped by new_session so late updates from a cleared session are dropped
 
 def on_enter_key(event):
     query = query_entry.get()
     if not query.strip():
         return
 
-    image_path = image_label.image_path
-    if not image_path:
+    if not session.images:
         status_text.set("Please upload an image first.")
         return
 
     status_text.set("Sending request to model...")
     query_entry.delete(0, tk.END)
+    query_entry.config(state="disabled")
+    output_text.insert(tk.END, f"\n\nYou: {query}\n", "user")
+    output_text.insert(tk.END, "AI: ", "bot")
+
+    threading.Thread(target=stream_worker, args=(query, answer_generation), daemon=True).start()
+
+
+# Runs off the main thread; every widget update goes through call_in_ui
+def stream_worker(query, generation):
+    global active_stream
+    try:
+        # Images are downscaled and encoded once; the session decides which ones to resend
+        messages = session.ask(query)
+        sent_bytes = sum(len(image) for message in messages for image in message.get("images", []))
+
+        started = time.perf_counter()
+        first_token = None
+        parts = []
+        response_stream = active_stream = stream_chat(backend, MODEL, messages)
+        for content in response_stream:
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            parts.append(content)
+            call_in_ui(append_answer, generation, content)
+        session.add_answer("".join(parts))
+
+        call_in_ui(
+            finish_answer,
+            generation,
+            f"Response complete. Sent {sent_bytes / 1024:.0f} KB of images, "
+            f"first token after {first_token or 0:.2f}s."
+        )
+    except Exception as e:
+        # Without an answer the question would leave two user turns in a row
+        if generation == answer_generation:
+            session.drop_question()
+        call_in_ui(append_answer, generation, f"\n[Error: {e}]\n", "error")
+        call_in_ui(finish_answer, generation, "Failed to get response.")
+
+
+# Updates from a session cleared since the question was asked are dropped
+def append_answer(generation, text, tag=None):
+    if generation != answer_generation:
+        return
+    output_text.insert(tk.END, text, tag)
+    output_text.see(tk.END)
+
+
+def finish_answer(generation, status):
+    if generation != answer_generation:
+        return
+    status_text.set(status)
+    query_entry.config(state="normal")
+
+
+# Worker threads queue widget updates here; pump_ui applies them on the Tk main loop
+ui_updates = queue.Queue()
+
 
-    def stream_worker():
+def call_in_ui(fn, *args):
+    ui_updates.put((fn, args))
+
+
+def pump_ui():
+    while True:
         try:
-            image_base64 = encode_image_base64(image_path)
-            output_text.insert(tk.END, f"\n\nYou: {query}\n", "user")
-
-            stream = ollama.chat(
-                model=MODEL,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": query,
-                        "images": [image_base64]
-                    }
-                ],
-                stream=True
-            )
-
-            output_text.insert(tk.END, "AI: ", "bot")
-            for chunk in stream:
-                content = chunk.get("message", {}).get("content", "")
-                output_text.insert(tk.END, content)
-                output_text.see(tk.END)
-
-            status_text.set("Response complete.")
-        except Exception as e:
-            output_text.insert(tk.END, f"\n[Error: {e}]\n", "error")
-            status_text.set("Failed to get response.")
-
-    threading.Thread(target=stream_worker, daemon=True).start()
+            fn, args = ui_updates.get_nowait()
+        except queue.Empty:
+            break
+        fn(*args)
+    root.after(FRAME_INTERVAL_MS, pump_ui)
+
 
 def upload_image():
     filepath = filedialog.askopenfilename(
@@ -81,21 +123,51 @@ def upload_image():
 
         image_label.config(image=photo)
         image_label.image = photo
-        image_label.image_path = filepath
-        status_text.set("Image uploaded successfully.")
+        number = session.attach(filepath)
+        images_text.set("Images: " + ", ".join(f"{n}) {name}" for n, name, _ in session.images))
+        status_text.set(f"Image {number} added. Refer to it as image {number} in your questions.")
+
+        # Preprocess for the model now so the next question doesn't wait for it
+        threading.Thread(target=prepare_image, args=(filepath,), daemon=True).start()
+
+
+def new_session():
+    global answer_generation
+    session.clear()
+    answer_generation += 1
+
+    # Stop any answer still streaming
+    if active_stream:
+        active_stream.close()
+
+    query_entry.config(state="normal")
+    image_label.config(image="")
+    image_label.image = None
+    images_text.set("")
+    output_text.delete(1.0, tk.END)
+    status_text.set("Started a new session.")
 
 # GUI setup
 root = tk.Tk()
 root.title("Ollama Vision Chat")
 root.geometry("600x750")
 
-upload_btn = tk.Button(root, text="Upload Image", command=upload_image)
-upload_btn.pack(pady=10)
+button_frame = tk.Frame(root)
+button_frame.pack(pady=10)
+
+upload_btn = tk.Button(button_frame, text="Add Image", command=upload_image)
+upload_btn.pack(side=tk.LEFT, padx=5)
+
+new_session_btn = tk.Button(button_frame, text="New Session", command=new_session)
+new_session_btn.pack(side=tk.LEFT, padx=5)
 
 image_label = tk.Label(root)
-image_label.image_path = None
 image_label.pack(pady=10)
 
+images_text = tk.StringVar()
+images_label = tk.Label(root, textvariable=images_text)
+images_label.pack()
+
 query_entry = tk.Entry(root, font=("Segoe UI", 12))
 query_entry.pack(fill=tk.X, padx=10, pady=5)
 query_entry.bind("<Return>", on_enter_key)
@@ -110,7 +182,9 @@ status_text = tk.StringVar()
 status_label = tk.Label(root, textvariable=status_text, fg="blue")
 status_label.pack(pady=5)
 
-# Pull model in background
-threading.Thread(target=ensure_model_available, args=(MODEL,), daemon=True).start()
+# Check, pull and preload the model in the background
+warmup = ModelWarmup(MODEL).start()
+show_warmup_progress(root, warmup, status_text.set)
 
+root.after(FRAME_INTERVAL_MS, pump_ui)
 root.mainloop()
@@ -3,23 +3,123 @@ ollama/webscraper.py
 This module provides functionality to scrape company websites and generate brochures using the Ollama LLM.
 '''
 
+import os
+import sys
 import gradio as gr
 import requests
-from bs4 import BeautifulSoup
-import ollama
 import logging
-import re
 import json
-from markdown import markdown
+import re
+import time
+from urllib.parse import urlsplit
+
+# Make the shared utils package importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import tracing
+from utils.crawler import crawl
+from utils.disk_cache import get_disk_cache
+from utils.extract import EXTRACT_VERSION, extract_page
+from utils.http import ASSET_EXTENSIONS, PageCache, fetch_all, normalize_link, same_site
+from utils.llm_cache import get_response_cache
+from utils.llm_client import OllamaBackend, stream_chat
+from utils.models import ModelWarmup
+from utils.render import IncrementalMarkdown, Throttle
+from utils.retrieval import get_retriever
+from utils.serving import JobServer, Progress, Stage, TooManyJobs, client_id
+from utils.tokens import MIN_SECTION_TOKENS, ContentBudget
 
 # Set your model name
 MODEL = "llama3.2"
+backend = OllamaBackend()
+warmup = None  # ModelWarmup started at launch
 
 # User-Agent header for website scraping
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36"
 }
 
+# Subpage fetch stage limits
+MAX_FETCH_WORKERS = 8
+MAX_FETCHES_PER_HOST = 4
+FETCH_DEADLINE = 20  # seconds for the whole subpage stage
+
+# Prompt tokens available for scraped content, and the main page's share of them
+CONTENT_TOKEN_BUDGET = 2500
+MAIN_PAGE_SHARE = 0.4
+
+# Subpages are fetched and packed in this order; unmatched link types go last
+LINK_PRIORITY = ["about", "company", "product", "service", "customer", "career", "job", "team", "blog"]
+
+# Link selection: links are resolved, deduplicated and scored by URL and anchor text first. If
+# enough brochure page types are matched with confidence the LLM is not asked at all; otherwise
+# it picks from the best LINK_CANDIDATES only, answering in the LINKS_SCHEMA format.
+# Keywords match whole words of the path (split on /, -, _ and .) or anchor text, in the singular
+# or plural, so "team" does not match /steam and "account" does not match /accounting.
+LINK_TYPES = {
+    "about page": ("about", "company", "who we are", "our story", "mission", "value"),
+    "products page": ("product", "service", "solution", "platform", "feature"),
+    "customers page": ("customer", "client", "case study", "testimonial", "success story"),
+    "careers page": ("career", "job", "join", "hiring", "work with us"),
+    "team page": ("team", "leadership", "people", "founder"),
+    "blog page": ("blog", "news", "press"),
+}
+SKIP_LINK_WORDS = ("login", "log in", "signin", "sign in", "signup", "sign up", "register", "account",
+                   "cart", "checkout", "privacy", "terms", "cookie", "legal", "imprint", "contact")
+CONFIDENT_SCORE = 3     # a top-level path and the anchor text both match the type
+CONFIDENT_TYPES = 3     # confident matches needed to skip the LLM
+LINK_CANDIDATES = 15
+MAX_SELECTED_LINKS = 6
+
+LINKS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "links": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"type": {"type": "string"}, "url": {"type": "string"}},
+                "required": ["type", "url"]
+            }
+        }
+    },
+    "required": ["links"]
+}
+
+# Retrieval: the prompt gets the chunks closest to what a brochure covers, not whole pages.
+# Off by default: it needs an embedding model pulled in Ollama (see utils/retrieval.py), and it
+# downloads every selected link, where get_all_website_content stops once the budget is full.
+USE_RETRIEVAL = False
+RETRIEVAL_QUERIES = [
+    "company mission, vision and values",
+    "company culture and what it is like to work here",
+    "customers, clients and case studies",
+    "careers, open jobs and hiring",
+    "products and services offered",
+]
+RETRIEVAL_TOP_K = 4  # chunks per query
+
+# Crawl mode: instead of the main page plus the selected links, crawl the site breadth-first
+# (utils/crawler.py) and pack the pages into the budget, most useful page types first
+USE_CRAWLER = False
+CRAWL_MAX_DEPTH = 2
+CRAWL_MAX_PAGES = 15
+
+# Serving: Gradio's queue runs up to HANDLER_CONCURRENCY requests and holds QUEUE_SIZE more.
+# Identical requests in flight share one job, each client may follow MAX_JOBS_PER_CLIENT jobs,
+# and inside a job the scraping and LLM stages each admit a limited number of jobs at a time.
+# LLM_CONCURRENCY bounds every call to Ollama: brochure streams, and the link selection and
+# embedding calls a job makes while scraping.
+QUEUE_SIZE = 64
+HANDLER_CONCURRENCY = 16
+SCRAPE_CONCURRENCY = 4
+LLM_CONCURRENCY = 2
+MAX_JOBS_PER_CLIENT = 2
+UPDATE_INTERVAL = 0.1  # seconds between brochure updates sent to the client
+scrape_stage = Stage("scrape", SCRAPE_CONCURRENCY)
+llm_stage = Stage("llm", LLM_CONCURRENCY)
+jobs = JobServer(MAX_JOBS_PER_CLIENT)
+
 # Log errors if needed
 logging.basicConfig(level=logging.WARNING)
 
@@ -59,90 +159,308 @@ brochure_system_prompt = """
 
 
 # Utility class
+# Pages go through the on-disk cache, so unchanged pages cost a 304 and no re-parse
 class Website:
     def __init__(self, url):
         self.url = url
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        self.title = soup.title.string.strip() if soup.title else "No title found"
-
-        if soup.body:
-            for tag in soup.body(["script", "style", "img", "input", "noscript"]):
-                tag.decompose()
-            self.text = soup.body.get_text(separator="\n", strip=True)
-        else:
-            self.text = ""
-
-        raw_links = [link.get('href') for link in soup.find_all('a')]
-        self.links = [link for link in raw_links if link and not link.startswith("mailto:")]
-
-    def get_contents(self):
-        return f"Title: {self.title}\n\n{self.text}\n\n"
-
-
-# URL check
-def is_url_reachable(url, timeout=5):
+        with tracing.span("website", url=url) as span:
+            page = get_disk_cache().fetch(
+                url, extract_page, kind=f"ollama.webscraper.v{EXTRACT_VERSION}", headers=headers
+            )
+            span.set(status=page.status_code, source=page.source)
+        self.ok = page.ok
+        self.title = page.data["title"]
+        self.text = page.data["text"]
+        self.links = page.data["links"]
+        self.anchors = page.data["anchors"]
+
+    def get_contents(self, text=None):
+        return f"Title: {self.title}\n\n{self.text if text is None else text}\n\n"
+
+
+# Parse the first JSON object in a model response
+def extract_json_from_text(text):
+    start = text.find("{")
+    if start < 0:
+        return None
     try:
-        return requests.head(url, timeout=timeout).status_code < 400
-    except requests.RequestException:
-        return False
+        return json.JSONDecoder().raw_decode(text[start:])[0]
+    except ValueError:
+        return None
 
 
-# Extract JSON from model response
-def extract_json_from_text(text):
-    match = re.search(r'\{.*\}', text, re.DOTALL)
-    return match.group(0) if match else None
+def _words(text):
+    return [word for word in re.split(r"[^a-z0-9]+", text.lower()) if word]
+
+
+# Whether keyword (one or more words) appears in words; its last word may be plural
+def _has_keyword(words, keyword):
+    *head, last = keyword.split()
+    forms = {last, last + "s", last + "es", last[:-1] + "ies" if last.endswith("y") else last}
+    n = len(head)
+    return any(words[i:i + n] == head and words[i + n] in forms for i in range(len(words) - n))
+
+
+# Best brochure type and score for a link; top-level path matches count most
+# Ties go to the type matched nearest the top of the path, then to LINK_TYPES order, so
+# /blog/product-news is a blog page even when its anchor text mentions a product.
+def score_link(url, anchor):
+    segments = [_words(s) for s in urlsplit(url).path.split("/") if s]
+    anchor = _words(anchor)
+    best_type, best_rank = None, (0, 0)
+    for link_type, keywords in LINK_TYPES.items():
+        depths = [depth for depth, words in enumerate(segments) if any(_has_keyword(words, k) for k in keywords)]
+        score = (2 if depths[0] == 0 else 1) if depths else 0
+        if any(_has_keyword(anchor, k) for k in keywords):
+            score += 1
+        rank = (score, -depths[0] if depths else -len(segments))
+        if score and rank > best_rank:
+            best_type, best_rank = link_type, rank
+    return best_type, best_rank[0]
+
+
+# Deterministic stage of link selection: same-site page links, each once, best first
+def candidate_links(website):
+    page_url = normalize_link(website.url, website.url)
+    candidates = {}
+    for href in website.links:
+        url = normalize_link(website.url, href)
+        if not url or url == page_url or url in candidates or not same_site(url, website.url):
+            continue
+        path = urlsplit(url).path.lower()
+        path_words = _words(path)
+        if path.endswith(ASSET_EXTENSIONS) or any(_has_keyword(path_words, word) for word in SKIP_LINK_WORDS):
+            continue
+        anchor = website.anchors.get(href, "")
+        link_type, score = score_link(url, anchor)
+        candidates[url] = {"url": url, "anchor": anchor, "type": link_type, "score": score,
+                           "depth": path.count("/")}
+    return sorted(candidates.values(), key=lambda c: (-c["score"], c["depth"]))
+
+
+# The best-scoring link of each type, and whether enough of them are confident matches
+def heuristic_links(candidates):
+    chosen = {}
+    for candidate in candidates:
+        if candidate["type"] and candidate["type"] not in chosen:
+            chosen[candidate["type"]] = candidate
+    confident = sum(1 for c in chosen.values() if c["score"] >= CONFIDENT_SCORE) >= CONFIDENT_TYPES
+    links = [{"type": c["type"], "url": c["url"]} for c in chosen.values()]
+    return links[:MAX_SELECTED_LINKS], confident
 
 
 # Build user prompt to extract relevant links
-def build_link_prompt(website):
+def build_link_prompt(website, candidates=None):
     prompt = f"Here is a list of links found on {website.url}:\n"
-    prompt += "\n".join(website.links)
-    return prompt
+    if candidates is None:
+        return prompt + "\n".join(website.links)
+    return prompt + "\n".join(
+        f"{c['url']} ({c['anchor']})" if c["anchor"] else c["url"] for c in candidates
+    )
+
+
+# Link selection is an LLM call too, so it waits for an LLM stage slot like the brochure streams
+def ask_for_links(messages):
+    with llm_stage.join() as ticket:
+        ticket.wait()
+        return tracing.ollama_chat(MODEL, messages, format=LINKS_SCHEMA)['message']['content']
+
+
+# Choose the subpages for the brochure: by heuristic when it is confident, else by asking the model
+# The model sees only the top candidates and must answer in LINKS_SCHEMA; urls it invents are
+# dropped, and if it fails the heuristic's picks are used instead.
+def get_links(url, pages=None):
+    with tracing.span("get_links", url=url) as span:
+        website = pages.get(url) if pages else Website(url)
+        candidates = candidate_links(website)
+        links, confident = heuristic_links(candidates)
+        span.set(links=len(website.links), candidates=len(candidates), confident=confident)
+        if confident or not candidates:
+            span.set(selected=len(links))
+            return {"links": links}
+
+        shortlist = candidates[:LINK_CANDIDATES]
+        messages = [
+            {"role": "system", "content": link_system_prompt},
+            {"role": "user", "content": build_link_prompt(website, shortlist)}
+        ]
+        try:
+            answer = get_response_cache().complete(
+                "ollama", MODEL, messages, lambda: ask_for_links(messages), options={"format": LINKS_SCHEMA}
+            )
+            allowed = {c["url"] for c in shortlist}
+            chosen = {}
+            for link in (extract_json_from_text(answer) or {}).get("links", []):
+                link_url = normalize_link(website.url, str(link.get("url", "")))
+                if link_url in allowed and link_url not in chosen:
+                    chosen[link_url] = {"type": str(link.get("type") or "page"), "url": link_url}
+            if chosen:
+                links = list(chosen.values())[:MAX_SELECTED_LINKS]
+        except Exception as e:
+            logging.warning(f"Link extraction failed, using heuristic links: {e}")
+        span.set(selected=len(links))
+        return {"links": links}
+
+
+# Rank a selected link by how useful its page type is for a brochure
+def link_priority(link):
+    link_type = link.get("type", "").lower()
+    for rank, keyword in enumerate(LINK_PRIORITY):
+        if keyword in link_type:
+            return rank
+    return len(LINK_PRIORITY)
 
 
-# Ask model to choose relevant pages
-def get_links(url):
-    website = Website(url)
-    user_prompt = build_link_prompt(website)
+# Collect page content from main + selected links
+# Pages come from a per-job PageCache so no url is downloaded or parsed twice. Text is packed
+# into a token budget by priority; fetching stops as soon as the budget is full.
+def get_all_website_content(url, pages=None, max_tokens=CONTENT_TOKEN_BUDGET):
+    pages = pages or PageCache(Website)
+    budget = ContentBudget(max_tokens)
+
+    # Subpages that fail or answer with an error status are skipped
+    def fetch_subpage(link_url):
+        subpage = pages.get(link_url)
+        return subpage if subpage.ok else None
 
     try:
-        response = ollama.chat(
-            model=MODEL,
-            messages=[
-                {"role": "system", "content": link_system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        json_text = extract_json_from_text(response['message']['content'])
-        return json.loads(json_text) if json_text else None
+        website = pages.get(url)
+        budget.charge(website.title)
+        main_text = budget.take(website.text, int(max_tokens * MAIN_PAGE_SHARE))
+        result = f"Main Page:\n{website.get_contents(main_text)}"
+
+        links_json = get_links(url, pages)
+        if links_json:
+            links = sorted(links_json["links"], key=link_priority)
+            deadline = time.monotonic() + FETCH_DEADLINE
+            done = 0
+            while done < len(links) and not budget.full:
+                # Only fetch as many pages as the remaining budget can still hold
+                wave = links[done:done + min(MAX_FETCH_WORKERS, budget.remaining // MIN_SECTION_TOKENS)]
+                subpages = fetch_all(
+                    [link["url"] for link in wave],
+                    fetch_subpage,
+                    max_workers=MAX_FETCH_WORKERS,
+                    per_host=MAX_FETCHES_PER_HOST,
+                    deadline=max(0, deadline - time.monotonic())
+                )
+                for link, subpage in zip(wave, subpages):
+                    done += 1
+                    if not subpage:
+                        continue
+                    # Each page gets a fair share of what is left; unused shares roll over
+                    budget.charge(subpage.title)
+                    text = budget.take(subpage.text, budget.remaining // (len(links) - done + 1))
+                    if text:
+                        result += f"\n\n---\n{link['type'].title()}:\n{subpage.get_contents(text)}"
+        return result
     except Exception as e:
-        logging.warning(f"Link extraction failed: {e}")
-        return None
+        logging.warning(f"Error scraping website content: {e}")
+        return ""
 
 
-# Collect page content from main + selected links
-def get_all_website_content(url):
-    try:
-        website = Website(url)
-        result = f"Main Page:\n{website.get_contents()}"
+# Collect only the most relevant chunks of the main page and all selected links
+# Every page is added to the local retrieval index (unchanged pages cost no embedding calls), then
+# the chunks closest to the brochure topics are packed into the budget, closest first, and shown in
+# page order. Falls back to get_all_website_content if the embedding model is not available.
+def get_relevant_website_content(url, pages=None, max_tokens=CONTENT_TOKEN_BUDGET):
+    pages = pages or PageCache(Website)
+
+    def fetch_subpage(link_url):
+        subpage = pages.get(link_url)
+        return subpage if subpage.ok else None
 
-        links_json = get_links(url)
+    try:
+        website = pages.get(url)
+        found = [("Main Page", website)]
+        links_json = get_links(url, pages)
         if links_json:
-            for link in links_json["links"]:
-                if is_url_reachable(link["url"]):
-                    subpage = Website(link["url"])
-                    result += f"\n\n---\n{link['type'].title()}:\n{subpage.get_contents()}"
-        return result[:5000]  # keep within model limits
+            links = sorted(links_json["links"], key=link_priority)
+            subpages = fetch_all(
+                [link["url"] for link in links],
+                fetch_subpage,
+                max_workers=MAX_FETCH_WORKERS,
+                per_host=MAX_FETCHES_PER_HOST,
+                deadline=FETCH_DEADLINE
+            )
+            found += [(link["type"].title(), subpage) for link, subpage in zip(links, subpages) if subpage]
+
+        with tracing.span("retrieval", pages=len(found)) as span, llm_stage.join() as ticket:
+            ticket.wait()
+            retriever = get_retriever()
+            embedded = retriever.embedded
+            for _, page in found:
+                retriever.add_document(page.url, page.text)
+            chunks = retriever.top_chunks(RETRIEVAL_QUERIES, RETRIEVAL_TOP_K, [page.url for _, page in found])
+            span.set(embedded=retriever.embedded - embedded, chunks=len(chunks))
     except Exception as e:
-        logging.warning(f"Error scraping website content: {e}")
+        logging.warning(f"Retrieval failed, sending whole pages instead: {e}")
+        return get_all_website_content(url, pages, max_tokens)
+
+    # A late page's best chunks beat an early page's weak ones
+    budget = ContentBudget(max_tokens)
+    titles = {page.url: page.title for _, page in found}
+    taken = {}
+    for chunk in sorted(chunks, key=lambda c: -c["score"]):
+        if budget.full:
+            break
+        if chunk["source"] in titles:
+            budget.charge(titles.pop(chunk["source"]))
+        text = budget.take(chunk["text"])
+        if text:
+            taken[(chunk["source"], chunk["position"])] = text
+
+    result = ""
+    for label, page in found:
+        text = "\n".join(taken[key] for key in sorted(key for key in taken if key[0] == page.url))
+        if text:
+            result += f"\n\n---\n{label}:\n" if result else f"{label}:\n"
+            result += page.get_contents(text)
+    return result
+
+
+# Collect page content from a breadth-first crawl of the site
+# The main page comes first, then crawled pages by the brochure priority of their url's type (as
+# for links) and by depth; untyped pages such as contact or legal pages go last. Near-duplicate
+# pages were already dropped by the crawler. The main page comes from the job's PageCache, so the
+# crawler does not download it again.
+def get_crawled_website_content(url, pages=None, max_tokens=CONTENT_TOKEN_BUDGET):
+    pages = pages or PageCache(Website)
+    try:
+        crawled = crawl(url, CRAWL_MAX_DEPTH, CRAWL_MAX_PAGES, start_page=pages.get(url))
+    except Exception as e:
+        logging.warning(f"Error crawling website: {e}")
+        return ""
+    if not crawled.pages or crawled.pages[0].depth:
         return ""
 
+    website, subpages = crawled.pages[0], []
+    for page in crawled.pages[1:]:
+        link_type, _ = score_link(page.url, "")
+        subpages.append((link_priority({"type": link_type or ""}), page.depth, link_type or "Page", page))
+    subpages.sort(key=lambda s: s[:2])
+
+    budget = ContentBudget(max_tokens)
+    budget.charge(website.title)
+    result = f"Main Page:\n{website.get_contents(budget.take(website.text, int(max_tokens * MAIN_PAGE_SHARE)))}"
+    for done, (_, _, label, page) in enumerate(subpages, 1):
+        if budget.full:
+            break
+        budget.charge(page.title)
+        text = budget.take(page.text, budget.remaining // (len(subpages) - done + 1))
+        if text:
+            result += f"\n\n---\n{label.title()}:\n{page.get_contents(text)}"
+    return result
+
 
 # Combine prompt with actual company name
-def build_brochure_prompt(company_name, url):
-    content = get_all_website_content(url)
+def build_brochure_prompt(company_name, url, pages=None):
+    if USE_CRAWLER:
+        content = get_crawled_website_content(url, pages)
+    elif USE_RETRIEVAL:
+        content = get_relevant_website_content(url, pages)
+    else:
+        content = get_all_website_content(url, pages)
     if not content:
         return None
 
@@ -153,41 +471,100 @@ def build_brochure_prompt(company_name, url):
         """
     return prompt
 
+# Chat messages for generating a brochure from a prompt built by build_brochure_prompt
+def brochure_messages(prompt):
+    return [
+        {"role": "system", "content": brochure_system_prompt},
+        {"role": "user", "content": prompt}
+    ]
+
+
 # Gradio streaming
+# With TRACING=1 each brochure gets a timeline of its stages (see utils/tracing.py)
 def stream_brochure(company_name, url):
-    if not is_url_reachable(url):
-        yield "Error: Website is not reachable."
-        return
-
-    prompt = build_brochure_prompt(company_name, url)
+    trace = tracing.start_trace("brochure", company=company_name, url=url)
+    try:
+        yield from _stream_brochure(company_name, url, trace)
+    finally:
+        trace.finish()
+
+
+def _stream_brochure(company_name, url, trace):
+    # Show model download/load progress instead of appearing hung on first use
+    while warmup and not warmup.ready.wait(0.5):
+        yield warmup.status
+
+    # Reachability comes from the main page GET, which the rest of the job reuses
+    pages = PageCache(Website)
+    with scrape_stage.join() as ticket:
+        yield from ticket.queued("Waiting to scrape the website (position {position} in queue)...")
+        yield Progress("Scraping the website...")
+        try:
+            with trace.activate():
+                reachable = pages.get(url).ok
+        except requests.RequestException:
+            reachable = False
+        if not reachable:
+            yield "Error: Website is not reachable."
+            return
+
+        with trace.activate():
+            prompt = build_brochure_prompt(company_name, url, pages)
     if not prompt:
         yield "Error: Could not scrape website content."
         return
 
+    messages = brochure_messages(prompt)
+
+    with llm_stage.join() as ticket:
+        yield from ticket.queued("Waiting for the model (position {position} in queue)...")
+        yield Progress("Writing the brochure...")
+
+        # Identical prompts replay the cached brochure as a stream
+        try:
+            with trace.activate():
+                stream = get_response_cache().stream(
+                    "ollama", MODEL, messages,
+                    lambda: stream_chat(backend, MODEL, messages)
+                )
+        except Exception as e:
+            yield f"Error: LLM request failed: {str(e)}"
+            return
+
+        # Finished Markdown blocks are rendered once; updates go out at most every UPDATE_INTERVAL
+        rendered = IncrementalMarkdown(strip_fences=True)
+        throttle = Throttle(UPDATE_INTERVAL)
+        pending = False
+        try:
+            for content in stream:
+                if content:
+                    rendered.feed(content)
+                    pending = True
+                    if throttle.due():
+                        yield rendered.html()
+                        pending = False
+            if pending:
+                yield rendered.html()
+        finally:
+            # Cancels the LLM request when the user leaves mid-stream
+            stream.close()
+
+
+# Gradio handler: requests for the same company and URL share the job already in flight
+def serve_brochure(company_name, url, request: gr.Request):
+    company_name, url = company_name.strip(), url.strip()
     try:
-        stream = ollama.chat(
-            model=MODEL,
-            messages=[
-                {"role": "system", "content": brochure_system_prompt},
-                {"role": "user", "content": prompt}
-            ],
-            stream=True
+        yield from jobs.stream(
+            ("brochure", company_name, url), client_id(request),
+            lambda: stream_brochure(company_name, url)
         )
-    except Exception as e:
-        yield f"Error: LLM request failed: {str(e)}"
-        return
-
-    response = ""
-    for chunk in stream:
-        content = chunk.get("message", {}).get("content", "")
-        if content:
-            response += content.replace("```", "")
-            yield markdown(response)
+    except TooManyJobs as e:
+        yield f"Error: {e}"
 
 
 # Gradio interface
 demo = gr.Interface(
-    fn=stream_brochure,
+    fn=serve_brochure,
     inputs=[
         gr.Textbox(label="Company Name", placeholder="e.g., HuggingFace"),
         gr.Textbox(label="Company Website URL", placeholder="e.g., https://huggingface.co")
@@ -199,4 +576,6 @@ demo = gr.Interface(
 )
 
 if __name__ == "__main__":
-    demo.launch()
+    tracing.init_from_env()
+    warmup = ModelWarmup(MODEL).start()
+    demo.queue(max_size=QUEUE_SIZE, default_concurrency_limit=HANDLER_CONCURRENCY).launch()
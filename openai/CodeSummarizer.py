@@ -0,0 +1,234 @@
+'''
+# openai/CodeSummarizer.py
+# Summarizes a whole Python source tree with OpenAI, factored out of notebooks/PythonCodeSummarizer.ipynb.
+# Files are split with ast at function and class boundaries (large classes per method), the units
+# are summarized concurrently, then rolled up into one summary per module and per package.
+# Requests are cached by their content, so after a small commit only the changed units, and the
+# modules and packages above them, are summarized again.
+#
+# Usage: python openai/CodeSummarizer.py path/to/project [-o CODE_SUMMARY.md]
+'''
+
+import argparse
+import ast
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from openai import OpenAI
+
+# Make the shared utils package importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.completions import CompletionRunner
+from utils.tokens import estimate_tokens
+
+MODEL = "gpt-4o-mini"
+UNIT_TOKENS = 1500        # code per unit summary; larger units are truncated
+ROLLUP_TOKENS = 6000      # summaries per module or package call
+UNIT_SUMMARY_TOKENS = 300
+ROLLUP_SUMMARY_TOKENS = 600
+MAX_WORKERS = 4
+SKIP_DIRS = {".git", "__pycache__", ".ipynb_checkpoints", ".venv", "venv", "env", "node_modules", "build", "dist"}
+
+unit_system_prompt = (
+    "You are a senior Python developer documenting a codebase. The input is one function, class, "
+    "method or the module-level code of a file. In 2-5 markdown bullet points, summarize what it does, "
+    "its inputs and outputs, side effects and anything surprising. Do not explain it line by line."
+)
+
+module_system_prompt = (
+    "You are a senior Python developer documenting a codebase. The input is summaries of the parts of "
+    "one Python module. Write a short markdown summary of the module: its purpose, its main classes and "
+    "functions, and how they fit together."
+)
+
+package_system_prompt = (
+    "You are a senior Python developer documenting a codebase. The input is summaries of the modules and "
+    "subpackages of one Python package or directory. Write a short markdown summary of it: its purpose, "
+    "how it is organised and its main entry points."
+)
+
+
+class CodeUnit:
+    def __init__(self, module, name, kind, source):
+        self.module = module    # path relative to the tree root
+        self.name = name
+        self.kind = kind        # "function", "class", "method" or "module code"
+        self.source = source
+
+    def prompt(self):
+        # The path is left out, so moving a file doesn't invalidate its cached summaries
+        source = self.source
+        if estimate_tokens(source) > UNIT_TOKENS:
+            source = source[:UNIT_TOKENS * 4] + "\n# ... (truncated)"
+        return f"{self.kind} {self.name}:\n```python\n{source}\n```"
+
+
+def find_sources(root):
+    """Python files under root, in a stable order."""
+    if os.path.isfile(root):
+        return [root]
+    paths = []
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
+        paths.extend(os.path.join(directory, f) for f in sorted(files) if f.endswith(".py"))
+    return paths
+
+
+def _span(node):
+    start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+    return start, node.end_lineno
+
+
+def split_units(module, source):
+    """Split one file's source into function, class, method and module-code units."""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return [CodeUnit(module, os.path.basename(module), "module code", source)] if source.strip() else []
+
+    lines = source.splitlines(keepends=True)
+    covered = set()
+    units = []
+
+    def take(name, kind, start, end):
+        units.append(CodeUnit(module, name, kind, "".join(lines[start - 1:end])))
+        covered.update(range(start, end + 1))
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            take(node.name, "function", *_span(node))
+        elif isinstance(node, ast.ClassDef):
+            start, end = _span(node)
+            if estimate_tokens("".join(lines[start - 1:end])) <= UNIT_TOKENS:
+                take(node.name, "class", start, end)
+                continue
+            # Too big for one request: each method on its own, then what is left of the class
+            for child in node.body:
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    take(f"{node.name}.{child.name}", "method", *_span(child))
+            rest = [lines[i - 1] for i in range(start, end + 1) if i not in covered]
+            units.append(CodeUnit(module, node.name, "class", "".join(rest)))
+            covered.update(range(start, end + 1))
+
+    rest = "".join(line for i, line in enumerate(lines, 1) if i not in covered)
+    if rest.strip():
+        units.append(CodeUnit(module, "<module>", "module code", rest))
+    return units
+
+
+class CodeSummarizer:
+    def __init__(self, client, model=MODEL, workers=MAX_WORKERS, limiter=None, cache=None):
+        self.runner = CompletionRunner(client, model, limiter=limiter, cache=cache)
+        self.workers = workers
+        self.units = 0
+
+    def _rollup(self, system, title, parts):
+        notes = [f"### {name}\n{summary}" for name, summary in parts]
+        notes = self.runner.fold(notes, system, ROLLUP_TOKENS, ROLLUP_SUMMARY_TOKENS, self.workers)
+        return self.runner.complete(system, f"{title}\n\n" + "\n\n---\n\n".join(notes), ROLLUP_SUMMARY_TOKENS)
+
+    def summarize_tree(self, root):
+        """
+        Summarize every Python file under root.
+
+        Returns {"modules": {path: summary}, "packages": {directory: summary}}, with paths
+        relative to root and "." for root itself. Raises ValueError if root holds no Python code.
+        """
+        base = root if os.path.isdir(root) else os.path.dirname(root)
+        units = []
+        for path in find_sources(root):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                units.extend(split_units(os.path.relpath(path, base), f.read()))
+        self.units = len(units)
+        if not units:
+            raise ValueError(f"No Python code found under {root}")
+        logging.info(f"Summarizing {len(units)} units")
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            unit_summaries = list(pool.map(
+                lambda unit: self.runner.complete(unit_system_prompt, unit.prompt(), UNIT_SUMMARY_TOKENS), units
+            ))
+
+            by_module = {}
+            for unit, summary in zip(units, unit_summaries):
+                by_module.setdefault(unit.module, []).append((f"{unit.kind} {unit.name}", summary))
+            modules = dict(zip(by_module, pool.map(
+                lambda module: self._rollup(module_system_prompt, f"Module {module}", by_module[module]),
+                by_module
+            )))
+
+        # Packages bottom-up: a directory's summary is built from its modules and subdirectories
+        contents, subdirs = {}, {}
+        for module in modules:
+            directory = os.path.dirname(module) or "."
+            contents.setdefault(directory, []).append(("module " + module, modules[module]))
+            while directory != ".":
+                parent = os.path.dirname(directory) or "."
+                if directory not in subdirs.setdefault(parent, []):
+                    subdirs[parent].append(directory)
+                directory = parent
+
+        def depth(directory):
+            return 0 if directory == "." else directory.count(os.sep) + 1
+
+        packages = {}
+        directories = set(contents) | set(subdirs)
+        with ThreadPoolExecutor(self.workers) as pool:
+            for level in sorted({depth(d) for d in directories}, reverse=True):
+                level = sorted(d for d in directories if depth(d) == level)
+                packages.update(zip(level, pool.map(lambda d: self._rollup(
+                    package_system_prompt, f"Package {d}",
+                    contents.get(d, []) + [("package " + sub, packages[sub]) for sub in subdirs.get(d, [])]
+                ), level)))
+        return {"modules": modules, "packages": packages}
+
+
+def report(result):
+    """The summaries as one markdown document, root package first."""
+    lines = ["# Code summary", "", result["packages"]["."], ""]
+    for directory in sorted(result["packages"]):
+        if directory != ".":
+            lines += [f"## Package `{directory}`", "", result["packages"][directory], ""]
+    for module in sorted(result["modules"]):
+        lines += [f"## Module `{module}`", "", result["modules"][module], ""]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a Python source tree.")
+    parser.add_argument("path", help="a directory or a single .py file")
+    parser.add_argument("-o", "--output", help="write the markdown report here instead of stdout")
+    parser.add_argument("--model", default=MODEL)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    summarizer = CodeSummarizer(OpenAI(max_retries=0), model=args.model, workers=args.workers)
+
+    started = time.perf_counter()
+    try:
+        result = summarizer.summarize_tree(args.path)
+    except ValueError as e:
+        sys.exit(str(e))
+    runner = summarizer.runner
+    logging.info(
+        f"Done in {time.perf_counter() - started:.1f}s: {summarizer.units} units, "
+        f"{runner.calls} API calls, cache hit rate {runner.hit_rate:.0%}, {runner.tokens} tokens"
+    )
+
+    text = report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+'''
+# openai/PaperSummarizer.py
+# Summarizes long research papers (PDF) with OpenAI using chunked map-reduce.
+# Pages are extracted in parallel and streamed into section-aware, token-bounded chunks, each
+# chunk is summarized as soon as it is complete under a client-side rate limit, and the partial
+# notes are combined hierarchically into the final 9-section summary. Every LLM call goes through
+# the shared response cache, so a re-run only pays for chunks whose text changed. With --retrieval
+# the paper is indexed locally instead, and one request gets only the excerpts closest to each
+# part of the summary.
+#
+# Usage: python openai/PaperSummarizer.py documents/attention-is-all-you-need-Paper.pdf [-o summary.md]
+'''
+
+import argparse
+import hashlib
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from openai import OpenAI
+
+# Make the shared utils package importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.completions import CompletionRunner
+from utils.pdf_text import iter_pages
+from utils.retrieval import get_retriever
+from utils.tokens import ContentBudget, estimate_tokens
+
+MODEL = "gpt-4o-mini"
+CHUNK_TOKENS = 3000       # paper text per map call
+REDUCE_TOKENS = 6000      # partial notes per combine call
+NOTES_TOKENS = 500        # answer size for map and combine calls
+SUMMARY_TOKENS = 1000     # answer size for the final summary
+MAX_WORKERS = 4
+
+# Retrieval mode: a single request with the excerpts closest to each part of the summary
+SECTION_QUERIES = [
+    "title and authors of the paper",
+    "research objective and problem addressed",
+    "background, motivation and related work",
+    "methods, model and approach",
+    "key results, experiments and numbers",
+    "conclusion and contributions",
+    "future work and open questions",
+    "limitations and challenges",
+    "applications in practice",
+]
+RETRIEVAL_TOP_K = 3       # excerpts per query
+
+system_prompt = """You are a research summarizer. That summarizes the content of the research paper in no more than 1000 words. The research summary that you provide should include the following:
+1) Title and Authors - Identify the study and contributors.
+2) Objective/Problem - State the research goal or question.
+3) Background - Briefly explain the context and significance.
+4) Methods - Summarize the approach or methodology.
+5) Key Findings - Highlight the main results or insights.
+6) Conclusion - Provide the implications or contributions of the study.
+7) Future Directions - Suggest areas for further research or exploration.
+8) Limitations - Highlight constraints or challenges in the study.
+9) Potential Applications - Discuss how the findings can be applied in real-world scenarios.
+Keep all points concise, clear, and focused and generate output in markdown."""
+
+chunk_system_prompt = """You are reading one part of a research paper. Write concise markdown notes on it \
+for someone who will later write a full summary of the paper. Keep the title and authors if present, \
+the problem, methods, key results with their numbers, conclusions, limitations and future work. \
+Do not add anything that is not in the text."""
+
+combine_system_prompt = """You are given notes on consecutive parts of a research paper. Merge them into \
+one set of concise markdown notes, keeping the title and authors, the problem, methods, key results with \
+their numbers, conclusions, limitations and future work. Remove repetition."""
+
+# Short lines that look like "Abstract", "3 Model Architecture" or "3.2.1 Scaled Dot-Product Attention"
+HEADING = re.compile(
+    r"^(abstract|introduction|background|related work|conclusions?|discussion|references|bibliography"
+    r"|acknowledge?ments?|appendix.*|\d+(\.\d+)*\.?\s+[A-Z][^.]{0,80})$"
+)
+END_HEADINGS = {"references", "bibliography", "acknowledgements", "acknowledgments"}
+
+
+def split_sections(lines):
+    """Split paper lines into (heading, body) sections as they arrive, stopping at the references."""
+    heading, body = "", []
+    for line in lines:
+        stripped = line.strip()
+        if HEADING.match(stripped):
+            if heading or "".join(body).strip():
+                yield heading, "\n".join(body).strip()
+            if stripped.lower() in END_HEADINGS:
+                return
+            heading, body = stripped, []
+        else:
+            body.append(line)
+    if heading or "".join(body).strip():
+        yield heading, "\n".join(body).strip()
+
+
+def _split_long(text, max_tokens):
+    # Cut an oversized section at paragraph, then line boundaries
+    pieces, current = [], ""
+    for part in re.split(r"(\n\s*\n|\n)", text):
+        if current and estimate_tokens(current + part) > max_tokens:
+            pieces.append(current.strip())
+            current = ""
+        current += part
+    if current.strip():
+        pieces.append(current.strip())
+    return pieces
+
+
+def chunk_sections(sections, max_tokens=CHUNK_TOKENS):
+    """Pack consecutive sections into chunks of at most max_tokens, splitting oversized ones."""
+    current = ""
+    for heading, body in sections:
+        parts = _split_long(body, max_tokens) or [""]
+        for i, part in enumerate(parts):
+            label = heading + (" (continued)" if i else "")
+            block = f"## {label}\n{part}" if label else part
+            if current and estimate_tokens(current + "\n\n" + block) > max_tokens:
+                yield current
+                current = ""
+            current = f"{current}\n\n{block}" if current else block
+    if current:
+        yield current
+
+
+class PaperSummarizer:
+    def __init__(self, client, model=MODEL, workers=MAX_WORKERS, limiter=None, cache=None):
+        self.runner = CompletionRunner(client, model, limiter=limiter, cache=cache)
+        self.workers = workers
+
+    def map_chunks(self, chunks):
+        # Chunks may be a generator fed by PDF extraction; each one is submitted as soon as it exists
+        with ThreadPoolExecutor(self.workers) as pool:
+            futures = [
+                pool.submit(self.runner.complete, chunk_system_prompt, chunk, NOTES_TOKENS) for chunk in chunks
+            ]
+            logging.info(f"Summarizing {len(futures)} chunks")
+            return [future.result() for future in futures]
+
+    def reduce_notes(self, notes):
+        # Combine groups of notes until everything fits in one final call
+        notes = self.runner.fold(notes, combine_system_prompt, REDUCE_TOKENS, NOTES_TOKENS, self.workers)
+
+        user_prompt = (
+            "You are looking at notes taken from consecutive parts of a research paper. "
+            "Summarize the paper in no more than 1000 words. The output should be in markdown.\n\n"
+            + "\n\n---\n\n".join(notes)
+        )
+        return self.runner.complete(system_prompt, user_prompt, SUMMARY_TOKENS)
+
+    def summarize_relevant(self, sections, retriever=None):
+        # Index the paper (a re-run embeds nothing) and keep the excerpts closest to each section
+        text = "\n\n".join(f"{heading}\n{body}" for heading, body in sections)
+        source = "sha256:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+        retriever = retriever or get_retriever()
+        retriever.add_document(source, text)
+        chunks = retriever.top_chunks(SECTION_QUERIES, RETRIEVAL_TOP_K, [source])
+
+        excerpts = ContentBudget(REDUCE_TOKENS).take("\n\n".join(chunk["text"] for chunk in chunks))
+        user_prompt = (
+            "You are looking at the most relevant excerpts of a research paper, in order. "
+            "Summarize the paper in no more than 1000 words. The output should be in markdown.\n\n"
+            + excerpts
+        )
+        return self.runner.complete(system_prompt, user_prompt, SUMMARY_TOKENS)
+
+    def summarize_lines(self, lines, retrieval=False):
+        if retrieval:
+            return self.summarize_relevant(split_sections(lines))
+        return self.reduce_notes(self.map_chunks(chunk_sections(split_sections(lines))))
+
+    def summarize_text(self, text, retrieval=False):
+        return self.summarize_lines(text.splitlines(), retrieval)
+
+    def summarize_pdf(self, pdf, retrieval=False):
+        """Summarize a PDF path, bytes or file object, starting on the first chunks while later pages extract."""
+        pages = iter_pages(pdf)
+        return self.summarize_lines((line for _, text in pages for line in text.splitlines()), retrieval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a research paper PDF with chunked map-reduce.")
+    parser.add_argument("pdf")
+    parser.add_argument("-o", "--output", help="write the markdown summary here instead of stdout")
+    parser.add_argument("--model", default=MODEL)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--retrieval", action="store_true",
+                        help="one request with the most relevant excerpts (needs an Ollama embedding model)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    summarizer = PaperSummarizer(OpenAI(max_retries=0), model=args.model, workers=args.workers)
+
+    started = time.perf_counter()
+    summary = summarizer.summarize_pdf(args.pdf, retrieval=args.retrieval)
+    logging.info(
+        f"Done in {time.perf_counter() - started:.1f}s: {summarizer.runner.calls} API calls, "
+        f"{summarizer.runner.cached} answered from cache, {summarizer.runner.tokens} tokens"
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(summary)
+    else:
+        print(summary)
+
+
+if __name__ == "__main__":
+    main()
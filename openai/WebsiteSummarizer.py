@@ -6,13 +6,47 @@
 # It handles website scraping, content extraction, and LLM interaction.
 '''
 
-import requests
+import os
+import sys
 import gradio as gr
-from bs4 import BeautifulSoup
 from openai import OpenAI
 
+# Make the shared utils package importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import tracing
+from utils.crawler import crawl
+from utils.disk_cache import get_disk_cache
+from utils.extract import EXTRACT_VERSION, extract_page
+from utils.llm_cache import get_response_cache
+from utils.llm_client import OpenAIBackend, stream_chat
+from utils.render import Throttle
+from utils.serving import JobServer, Progress, Stage, TooManyJobs, client_id
+from utils.tokens import ContentBudget
+
 OPENAI_API_KEY="your-openai-api-key"
 openai = OpenAI(api_key=OPENAI_API_KEY)
+backend = OpenAIBackend(api_key=OPENAI_API_KEY)
+MODEL = "gpt-4o-mini"
+
+# Serving limits (see utils/serving.py): Gradio queue size and handler threads, jobs allowed in
+# the fetch and LLM stages at once, and jobs each client may follow. Identical URLs in flight
+# share one job.
+QUEUE_SIZE = 64
+HANDLER_CONCURRENCY = 16
+FETCH_CONCURRENCY = 8
+LLM_CONCURRENCY = 8
+MAX_JOBS_PER_CLIENT = 2
+UPDATE_INTERVAL = 0.1  # seconds between summary updates sent to the client
+fetch_stage = Stage("fetch", FETCH_CONCURRENCY)
+llm_stage = Stage("llm", LLM_CONCURRENCY)
+jobs = JobServer(MAX_JOBS_PER_CLIENT)
+
+# Crawl mode: summarize the site from a breadth-first crawl (utils/crawler.py) instead of one page
+USE_CRAWLER = False
+CRAWL_MAX_DEPTH = 1
+CRAWL_MAX_PAGES = 8
+CRAWL_TOKEN_BUDGET = 4000
 
 system_prompt = """You are an assistant that analyzes the contents of a website \
 and provides a short summary, ignoring text that might be navigation related. \
@@ -22,15 +56,38 @@ headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36"
 }
 
+# Pages go through the shared on-disk cache (see utils/disk_cache.py)
 class Website:
     def __init__(self, url):
         self.url = url
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        self.title = soup.title.string if soup.title else "No title found"
-        for irrelevant in soup.body(["script", "style", "img", "input"]):
-            irrelevant.decompose()
-        self.text = soup.body.get_text(separator="\n", strip=True) if soup.body else ""
+        with tracing.span("website", url=url) as span:
+            page = get_disk_cache().fetch(
+                url, extract_page, kind=f"openai.summarizer.v{EXTRACT_VERSION}", headers=headers
+            )
+            span.set(status=page.status_code, source=page.source)
+        self.title = page.data["title"]
+        self.text = page.data["text"]
+
+# Crawled pages joined into one Website-like object; the main page first, in crawl order
+class CrawledSite:
+    def __init__(self, url):
+        self.url = url
+        result = crawl(url, CRAWL_MAX_DEPTH, CRAWL_MAX_PAGES)
+        if not result.pages:
+            raise ValueError(f"Could not fetch {url}")
+        self.title = result.pages[0].title
+        self.pages = len(result.pages)
+        budget = ContentBudget(CRAWL_TOKEN_BUDGET)
+        sections = []
+        for done, page in enumerate(result.pages):
+            if budget.full:
+                break
+            # Each page gets a fair share of what is left; unused shares roll over
+            budget.charge(page.title)
+            text = budget.take(page.text, budget.remaining // (len(result.pages) - done))
+            if text:
+                sections.append(f"Page: {page.title} ({page.url})\n{text}")
+        self.text = "\n\n".join(sections)
 
 def user_prompt_for(website):
     user_prompt = f"You are looking at a website titled {website.title}"
@@ -51,20 +108,43 @@ def summarize_stream(url):
         yield "Please enter a valid URL."
         return
 
+    trace = tracing.start_trace("summary", url=url)
     try:
-        website = Website(url)
-        response = openai.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages_for(website),
-            stream=True
-        )
-        partial = ""
-        for chunk in response:
-            if chunk.choices and chunk.choices[0].delta.content:
-                partial += chunk.choices[0].delta.content
-                yield partial
+        with fetch_stage.join() as ticket:
+            yield from ticket.queued("Waiting to fetch the page (position {position} in queue)...")
+            yield Progress("Crawling the site..." if USE_CRAWLER else "Fetching the page...")
+            with trace.activate():
+                website = CrawledSite(url) if USE_CRAWLER else Website(url)
+                messages = messages_for(website)
+
+        with llm_stage.join() as ticket:
+            yield from ticket.queued("Waiting for the model (position {position} in queue)...")
+            yield Progress("Summarizing...")
+            with trace.activate():
+                # Identical page text replays the cached summary as a stream
+                response = get_response_cache().stream(
+                    "openai", MODEL, messages,
+                    lambda: stream_chat(backend, MODEL, messages)
+                )
+            # The whole summary so far goes to the client, so send it at most every UPDATE_INTERVAL
+            parts = []
+            throttle = Throttle(UPDATE_INTERVAL)
+            pending = False
+            try:
+                for delta in response:
+                    parts.append(delta)
+                    pending = True
+                    if throttle.due():
+                        yield "".join(parts)
+                        pending = False
+                if pending:
+                    yield "".join(parts)
+            finally:
+                response.close()
     except Exception as e:
         yield f"Error: {str(e)}"
+    finally:
+        trace.finish()
 
 
 with gr.Blocks() as demo:
@@ -81,10 +161,15 @@ with gr.Blocks() as demo:
             output = gr.Markdown(label="Summary Output")
 
     # Logic to disable/enable button while generating
-    def wrap_summarizer(url):
+    # Requests for a URL already being summarized follow that job
+    def wrap_summarizer(url, request: gr.Request):
         yield gr.update(interactive=False), ""  # Clear output and disable button
-        for output_chunk in summarize_stream(url):
-            yield gr.update(), output_chunk
+        url = url.strip()
+        try:
+            for output_chunk in jobs.stream(("summary", url), client_id(request), lambda: summarize_stream(url)):
+                yield gr.update(), output_chunk
+        except TooManyJobs as e:
+            yield gr.update(), f"Error: {e}"
         yield gr.update(interactive=True), gr.update()  # Just re-enable button, don't clear output
 
 
@@ -101,4 +186,5 @@ with gr.Blocks() as demo:
     )
 
 if __name__ == "__main__":
-    demo.launch()
+    tracing.init_from_env()
+    demo.queue(max_size=QUEUE_SIZE, default_concurrency_limit=HANDLER_CONCURRENCY).launch()
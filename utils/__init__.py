@@ -0,0 +1,4 @@
+'''
+utils
+Common helper modules shared by the ollama/ and openai/ apps.
+'''
@@ -0,0 +1,103 @@
+'''
+utils/completions.py
+Rate-limited, retried and cached OpenAI chat completions for the batch summarizers.
+
+CompletionRunner.complete() goes through the shared response cache, so an identical request
+(same model, prompts and max_tokens) is answered from disk; misses wait on a client-side
+RateLimiter and retry 429s and transient errors with backoff. It counts API calls, cache hits
+and tokens spent, and is safe to call from a worker pool.
+'''
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+from utils.llm_cache import get_response_cache
+from utils.ratelimit import RateLimiter
+from utils.tokens import estimate_tokens
+
+REQUESTS_PER_MINUTE = 500
+TOKENS_PER_MINUTE = 200000
+MAX_RETRIES = 5
+RETRYABLE = (RateLimitError, APIConnectionError, InternalServerError)
+
+
+def group_by_tokens(texts, max_tokens, separator="\n\n---\n\n"):
+    """Split texts, in order, into groups whose joined size stays within max_tokens."""
+    groups, current = [], []
+    for text in texts:
+        if current and estimate_tokens(separator.join(current + [text])) > max_tokens:
+            groups.append(current)
+            current = []
+        current.append(text)
+    if current:
+        groups.append(current)
+    return groups
+
+
+class CompletionRunner:
+    def __init__(self, client, model, limiter=None, cache=None, max_retries=MAX_RETRIES):
+        self.client = client
+        self.model = model
+        self.limiter = limiter or RateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE)
+        self.cache = cache or get_response_cache()
+        self.max_retries = max_retries
+        self.calls = 0
+        self.cached = 0
+        self.tokens = 0    # prompt + completion tokens reported by the API
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self):
+        total = self.calls + self.cached
+        return self.cached / total if total else 0.0
+
+    def complete(self, system, user, max_tokens):
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+        called = []
+
+        def call():
+            called.append(True)
+            self.limiter.acquire(estimate_tokens(system + user) + max_tokens)
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = self.client.chat.completions.create(
+                        model=self.model, messages=messages, max_tokens=max_tokens
+                    )
+                    if response.usage:
+                        with self._lock:
+                            self.tokens += response.usage.total_tokens
+                    return response.choices[0].message.content
+                except RETRYABLE as e:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = 2 ** attempt
+                    logging.warning(f"OpenAI call failed ({e}); retrying in {delay}s")
+                    time.sleep(delay)
+
+        answer = self.cache.complete("openai", self.model, messages, call, options={"max_tokens": max_tokens})
+        with self._lock:
+            if called:
+                self.calls += 1
+            else:
+                self.cached += 1
+        return answer
+
+    def fold(self, notes, system, max_tokens, answer_tokens, workers=4):
+        """
+        Combine groups of notes with the given prompt until they fit in max_tokens together.
+
+        Returns the remaining notes; stops early if every note is already at the limit on its own.
+        """
+        while len(notes) > 1 and estimate_tokens("\n\n---\n\n".join(notes)) > max_tokens:
+            groups = group_by_tokens(notes, max_tokens)
+            if len(groups) == len(notes):
+                break
+            with ThreadPoolExecutor(workers) as pool:
+                notes = list(pool.map(
+                    lambda group: self.complete(system, "\n\n---\n\n".join(group), answer_tokens), groups
+                ))
+        return notes
@@ -0,0 +1,361 @@
+'''
+utils/crawler.py
+Polite breadth-first crawler for whole company sites.
+
+Starting from a site's main page, the crawler follows same-site links level by level up to
+max_depth hops and max_pages pages. It is built for batches of sites:
+
+- every request goes through one global connection limit, and requests to the same host are
+  spaced by HOST_DELAY seconds (or the site's robots.txt Crawl-delay, if longer);
+- robots.txt is fetched once per host and cached for ROBOTS_TTL; disallowed URLs are skipped;
+- links are normalized (utils/http.normalize_link) and deduplicated before they enter the
+  frontier, and files such as PDFs or images are never fetched;
+- pages whose text is identical, or shares at least NEAR_DUPLICATE_SIMILARITY of its 3-word
+  shingles (Jaccard) with a page already kept, are dropped, so print views, tracking-parameter
+  copies and templated pages don't fill the prompt.
+
+The crawl runs on its own event loop thread with async httpx; HTML parsing runs in worker
+threads so it never stalls other fetches. crawl() and crawl_many() are the blocking entry points
+for the apps and batch.py. Pages come back in crawl order with the attributes of the apps'
+Website objects (url, ok, title, text, links, anchors, get_contents()), so they can go straight
+into the brochure and summary prompts.
+
+    python -m utils.crawler https://example.com --max-depth 2 --max-pages 25
+    python -m utils.crawler    # checks the crawler against the fixture site (utils/fixture_server.py)
+'''
+
+import asyncio
+import collections
+import hashlib
+import logging
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+from utils.extract import extract_page
+from utils.http import ASSET_EXTENSIONS, DEFAULT_HEADERS, normalize_link, same_site
+
+MAX_DEPTH = 2
+MAX_PAGES = 25
+MAX_CONNECTIONS = 16      # requests in flight across all sites
+HOST_DELAY = 0.5          # seconds between requests to one host
+ROBOTS_TTL = 3600
+NEAR_DUPLICATE_SIMILARITY = 0.8
+MIN_SHINGLE_WORDS = 50    # shorter pages are only deduplicated when identical
+TIMEOUT = 10
+MAX_PAGE_BYTES = 2 * 2 ** 20
+
+
+class CrawledPage:
+    """One crawled page, usable wherever the apps take a Website."""
+
+    def __init__(self, url, depth, status_code, data=None, error=None):
+        self.url = url
+        self.depth = depth
+        self.status_code = status_code
+        self.error = error
+        data = data or {"title": "No title found", "text": "", "links": [], "anchors": {}}
+        self.title = data["title"]
+        self.text = data["text"]
+        self.links = data["links"]
+        self.anchors = data.get("anchors", {})
+        self.duplicate_of = None
+
+    @property
+    def ok(self):
+        return self.status_code is not None and self.status_code < 400 and self.error is None
+
+    def get_contents(self, text=None):
+        return f"Title: {self.title}\n\n{self.text if text is None else text}\n\n"
+
+
+class CrawlResult:
+    """Pages of one site in crawl order, plus what was skipped on the way."""
+
+    def __init__(self, start_url):
+        self.start_url = start_url
+        self.pages = []           # kept pages: fetched, ok and not duplicates
+        self.duplicates = []      # pages dropped as (near-)duplicates of a kept page
+        self.failed = []          # pages that errored or answered >= 400
+        self.disallowed = []      # urls robots.txt does not allow
+        self.elapsed = 0.0
+
+    def stats(self):
+        return {"pages": len(self.pages), "duplicates": len(self.duplicates), "failed": len(self.failed),
+                "disallowed": len(self.disallowed), "seconds": round(self.elapsed, 3)}
+
+
+def _words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def shingles(words):
+    """Hashes of a text's 3-word shingles."""
+    return {hash(tuple(words[i:i + 3])) for i in range(max(1, len(words) - 2))}
+
+
+class _Fingerprints:
+    """Exact and near-duplicate detection over the pages kept so far for one site."""
+
+    def __init__(self):
+        self._exact = {}    # sha256 of normalized text -> url
+        self._shingles = []
+
+    def duplicate_of(self, page):
+        words = _words(page.text)
+        digest = hashlib.sha256(" ".join(words).encode("utf-8")).hexdigest()
+        if digest in self._exact:
+            return self._exact[digest]
+        self._exact[digest] = page.url
+        if len(words) < MIN_SHINGLE_WORDS:
+            return None
+        page_shingles = shingles(words)
+        for other, url in self._shingles:
+            if len(page_shingles & other) / len(page_shingles | other) >= NEAR_DUPLICATE_SIMILARITY:
+                return url
+        self._shingles.append((page_shingles, page.url))
+        return None
+
+
+class Crawler:
+    """
+    Crawls sites on a background event loop; one instance can serve many crawls at once and
+    shares its connection limit, host spacing and robots.txt cache between them.
+    """
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, host_delay=HOST_DELAY, headers=None, timeout=TIMEOUT):
+        self.max_connections = max_connections
+        self.host_delay = host_delay
+        self.headers = headers or DEFAULT_HEADERS
+        self.timeout = timeout
+        self.requests = 0
+        self.totals = collections.Counter()    # summed CrawlResult.stats() of finished crawls
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="crawler-loop", daemon=True).start()
+        self._client = None
+        self._connections = None
+        self._hosts = {}     # host -> [lock, time the next request may start]
+        self._robots = {}    # scheme://host -> (fetched_at, RobotFileParser or None)
+
+    # Blocking entry points
+
+    def crawl(self, url, max_depth=MAX_DEPTH, max_pages=MAX_PAGES, start_page=None):
+        """Crawl one site and return its CrawlResult."""
+        crawl = self.crawl_async(url, max_depth, max_pages, start_page)
+        return asyncio.run_coroutine_threadsafe(crawl, self.loop).result()
+
+    def crawl_many(self, urls, max_depth=MAX_DEPTH, max_pages=MAX_PAGES):
+        """Crawl several sites concurrently; results are in input order."""
+        async def crawl_all():
+            return await asyncio.gather(*(self.crawl_async(url, max_depth, max_pages) for url in urls))
+        return asyncio.run_coroutine_threadsafe(crawl_all(), self.loop).result()
+
+    # Crawl
+
+    async def crawl_async(self, url, max_depth=MAX_DEPTH, max_pages=MAX_PAGES, start_page=None):
+        """
+        Crawl one site breadth-first.
+
+        start_page is the main page when the caller has already fetched it (anything with the
+        Website attributes ok, title, text, links and anchors); it is used instead of a second GET.
+        """
+        started = time.perf_counter()
+        start_url = normalize_link(url, url)
+        result = CrawlResult(start_url)
+        fingerprints = _Fingerprints()
+        seen = {start_url}
+        frontier = collections.deque([(start_url, 0)])
+
+        while frontier and len(result.pages) < max_pages:
+            # Failures and duplicates don't use up the page limit, so each batch takes only what can
+            # still be kept from the shallowest level; the rest of the level goes in the next batch
+            depth = frontier[0][1]
+            fetches = []
+            while frontier and frontier[0][1] == depth and len(fetches) < max_pages - len(result.pages):
+                link, _ = frontier.popleft()
+                if link == start_url and start_page is not None:
+                    fetches.append(self._given(link, start_page))
+                elif await self._allowed(link):
+                    fetches.append(self._fetch(link, depth))
+                else:
+                    result.disallowed.append(link)
+            pages = await asyncio.gather(*fetches)
+
+            for page in pages:
+                if not page.ok:
+                    result.failed.append(page)
+                    continue
+                page.duplicate_of = fingerprints.duplicate_of(page)
+                if page.duplicate_of:
+                    result.duplicates.append(page)
+                    continue
+                result.pages.append(page)
+                if depth == max_depth:
+                    continue
+                for href in page.links:
+                    link = normalize_link(page.url, href)
+                    if link and link not in seen and same_site(link, start_url) \
+                            and not urlsplit(link).path.lower().endswith(ASSET_EXTENSIONS):
+                        seen.add(link)
+                        frontier.append((link, depth + 1))
+
+        result.elapsed = time.perf_counter() - started
+        self.totals.update(result.stats())
+        return result
+
+    @staticmethod
+    async def _given(url, website):
+        if not website.ok:
+            return CrawledPage(url, 0, None, error="main page could not be fetched")
+        data = {"title": website.title, "text": website.text, "links": website.links, "anchors": website.anchors}
+        return CrawledPage(url, 0, 200, data)
+
+    async def _fetch(self, url, depth):
+        try:
+            response, body = await self._get(url)
+        except httpx.HTTPError as e:
+            logging.warning(f"Crawl fetch failed for {url}: {e!r}")
+            return CrawledPage(url, depth, None, error=repr(e))
+        if response.status_code >= 400:
+            return CrawledPage(url, depth, response.status_code)
+        if "html" not in response.headers.get("content-type", "html"):
+            return CrawledPage(url, depth, response.status_code, error="not an HTML page")
+        # Redirects count as the page they land on
+        final_url = normalize_link(url, str(response.url)) or url
+        data = await asyncio.to_thread(extract_page, body)
+        return CrawledPage(final_url, depth, response.status_code, data)
+
+    # Politeness
+
+    # Returns (response, body). Only the body of a text answer is read, and only its first
+    # MAX_PAGE_BYTES, so a huge page or a file served as a page never ends up in memory.
+    async def _get(self, url):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers, timeout=self.timeout, follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.max_connections)
+            )
+            self._connections = asyncio.Semaphore(self.max_connections)
+        await self._wait_for_host(url)
+        async with self._connections:
+            self.requests += 1
+            async with self._client.stream("GET", url) as response:
+                content_type = response.headers.get("content-type", "text/html")
+                if response.status_code >= 400 or not ("html" in content_type or content_type.startswith("text/")):
+                    return response, b""
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes():
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= MAX_PAGE_BYTES:
+                        break
+                return response, b"".join(chunks)[:MAX_PAGE_BYTES]
+
+    # Space out request starts per host by the larger of host_delay and the robots Crawl-delay
+    async def _wait_for_host(self, url):
+        host = urlsplit(url).netloc
+        slot = self._hosts.setdefault(host, [asyncio.Lock(), 0.0])
+        robots = self._robots.get(self._origin(url))
+        delay = self.host_delay
+        if robots and robots[1]:
+            delay = max(delay, float(robots[1].crawl_delay(self.headers["User-Agent"]) or 0))
+        async with slot[0]:
+            wait = slot[1] - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            slot[1] = time.monotonic() + delay
+
+    @staticmethod
+    def _origin(url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    async def _allowed(self, url):
+        origin = self._origin(url)
+        cached = self._robots.get(origin)
+        if cached is None or time.time() - cached[0] > ROBOTS_TTL:
+            cached = self._robots[origin] = (time.time(), await self._fetch_robots(origin))
+        parser = cached[1]
+        return parser is None or parser.can_fetch(self.headers["User-Agent"], url)
+
+    # None (allow everything) when the site has no usable robots.txt
+    async def _fetch_robots(self, origin):
+        try:
+            response, body = await self._get(f"{origin}/robots.txt")
+        except httpx.HTTPError as e:
+            logging.warning(f"Could not fetch robots.txt for {origin}: {e!r}")
+            return None
+        if response.status_code >= 400:
+            return None
+        parser = RobotFileParser()
+        parser.parse(body.decode("utf-8", "replace").splitlines())
+        return parser
+
+
+_crawler = None
+_crawler_lock = threading.Lock()
+
+
+def get_crawler():
+    """Return the process-wide Crawler, starting its loop thread on first use."""
+    global _crawler
+    with _crawler_lock:
+        if _crawler is None:
+            _crawler = Crawler()
+    return _crawler
+
+
+def crawl(url, max_depth=MAX_DEPTH, max_pages=MAX_PAGES, start_page=None):
+    """Crawl one site with the process-wide Crawler."""
+    return get_crawler().crawl(url, max_depth, max_pages, start_page)
+
+
+# Crawl the fixture site and check what its pages are set up to test
+def check_fixture_site():
+    from utils.fixture_server import FixtureServer
+
+    site = FixtureServer().start()
+    result = Crawler(host_delay=0).crawl(site.url + "/")
+    duplicates = {urlsplit(p.url).path: urlsplit(p.duplicate_of).path for p in result.duplicates}
+    problems = []
+    if duplicates.get("/company") != "/about":
+        problems.append(f"/company should be a duplicate of /about, duplicates: {duplicates}")
+    if [urlsplit(u).path for u in result.disallowed] != ["/private"]:
+        problems.append(f"only /private should be disallowed, got {result.disallowed}")
+    if "/private" in site.counts:
+        problems.append("/private was fetched")
+    problems += [f"{path} fetched {count} times" for path, count in site.counts.items() if count > 1]
+    problems += [f"{path} is not a page" for path in site.counts if path.endswith(ASSET_EXTENSIONS)]
+
+    print(f"{result.stats()}, {site.requests} requests")
+    for problem in problems:
+        print(f"  {problem}")
+    return not problems
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Crawl a site, or check the crawler against the fixture site")
+    parser.add_argument("url", nargs="?")
+    parser.add_argument("--max-depth", type=int, default=MAX_DEPTH)
+    parser.add_argument("--max-pages", type=int, default=MAX_PAGES)
+    args = parser.parse_args()
+
+    if not args.url:
+        sys.exit(0 if check_fixture_site() else 1)
+    result = crawl(args.url, args.max_depth, args.max_pages)
+    for page in result.pages:
+        print(f"{page.depth} {page.url} {page.title!r} ({len(page.text)} chars)")
+    for page in result.duplicates:
+        print(f"duplicate {page.url} of {page.duplicate_of}")
+    for page in result.failed:
+        print(f"failed {page.url} {page.status_code or page.error}")
+    for url in result.disallowed:
+        print(f"disallowed {url}")
+    print(result.stats())
@@ -0,0 +1,218 @@
+'''
+utils/disk_cache.py
+Persistent, size-bounded page cache shared by the Website classes.
+
+Raw page bytes are stored in SQLite keyed by URL together with their ETag/Last-Modified
+validators. Every fetch is a conditional GET, so an unchanged page costs a 304 and its
+extracted text is served from the cache without parsing the HTML again. Extracted text is
+stored per extractor ("kind") and content hash, because each app parses pages differently.
+
+Run `python -m utils.disk_cache` from the repo root to print cache stats, or add `--clear`.
+'''
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from utils import tracing
+from utils.http import get_session
+
+DEFAULT_PATH = os.environ.get(
+    "PAGE_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "hands-on-llms", "pages.sqlite3")
+)
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_TTL = 7 * 24 * 3600  # seconds an entry may go without being revalidated
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    sha256 TEXT NOT NULL,
+    content BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    validated_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS extracts (
+    url TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (url, kind)
+);
+CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at);
+"""
+
+
+class CachedPage:
+    def __init__(self, url, status_code, data, source):
+        self.url = url
+        self.status_code = status_code
+        self.data = data
+        self.source = source  # "revalidated", "unchanged", "fetched" or "uncached"
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+
+class DiskCache:
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0      # 304 Not Modified, served from cache
+        self.reused = 0    # 200 with identical bytes, extracted text reused
+        self.misses = 0    # new or changed page, parsed again
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+    def fetch(self, url, extract, kind, timeout=10, headers=None):
+        """
+        GET url through the cache and return a CachedPage whose data is extract(content).
+
+        extract must return something JSON-serializable; its result is cached under kind.
+        """
+        now = time.time()
+        row = self._lookup(url, now)
+
+        request_headers = dict(headers or {})
+        if row:
+            etag, last_modified = row[0], row[1]
+            if etag:
+                request_headers["If-None-Match"] = etag
+            if last_modified:
+                request_headers["If-Modified-Since"] = last_modified
+
+        with tracing.span("http.get", url=url, conditional=bool(row)) as span:
+            response = get_session().get(url, headers=request_headers, timeout=timeout)
+            span.set(status=response.status_code, bytes=len(response.content))
+
+        if response.status_code == 304 and row:
+            with self._lock:
+                self.hits += 1
+                self._db.execute(
+                    "UPDATE pages SET validated_at = ?, accessed_at = ? WHERE url = ?", (now, now, url)
+                )
+                self._db.commit()
+            return CachedPage(url, 200, self._extract(url, kind, row[2], row[3], extract), "revalidated")
+
+        content = response.content
+        if response.status_code >= 400:
+            with tracing.span("html.extract", url=url):
+                return CachedPage(url, response.status_code, extract(content), "uncached")
+
+        sha = hashlib.sha256(content).hexdigest()
+        unchanged = bool(row) and row[2] == sha
+        with self._lock:
+            if unchanged:
+                self.reused += 1
+            else:
+                self.misses += 1
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                 sha, content, len(content), now, now)
+            )
+            self._db.commit()
+        data = self._extract(url, kind, sha, content, extract)
+        self._evict()
+        return CachedPage(url, response.status_code, data, "unchanged" if unchanged else "fetched")
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        lookups = self.hits + self.reused + self.misses
+        return {
+            "hits": self.hits,
+            "reused": self.reused,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.reused) / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+            self._db.execute("DELETE FROM extracts")
+            self._db.commit()
+
+    # Return (etag, last_modified, sha256, content) for a live entry, dropping it if expired
+    def _lookup(self, url, now):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, sha256, content, validated_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row and now - row[4] > self.ttl:
+                self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+                self._db.execute("DELETE FROM extracts WHERE url = ?", (url,))
+                self._db.commit()
+                return None
+        return row[:4] if row else None
+
+    # Extracted data for (url, kind) if it matches the content hash, else parse and store it
+    def _extract(self, url, kind, sha, content, extract):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sha256, data FROM extracts WHERE url = ? AND kind = ?", (url, kind)
+            ).fetchone()
+        if row and row[0] == sha:
+            return json.loads(row[1])
+
+        with tracing.span("html.extract", url=url, bytes=len(content)):
+            data = extract(content)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO extracts VALUES (?, ?, ?, ?)", (url, kind, sha, json.dumps(data))
+            )
+            self._db.commit()
+        return data
+
+    # Drop least recently used pages until the cache fits in max_bytes
+    def _evict(self):
+        with self._lock:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = self._db.execute("SELECT url, size FROM pages ORDER BY accessed_at").fetchall()
+            for url, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+                self._db.execute("DELETE FROM extracts WHERE url = ?", (url,))
+                total -= size
+            self._db.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_disk_cache():
+    """Return the process-wide DiskCache at DEFAULT_PATH, opening it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskCache()
+    return _cache
+
+
+if __name__ == "__main__":
+    cache = get_disk_cache()
+    if "--clear" in sys.argv:
+        cache.clear()
+        print(f"Cleared {cache.path}")
+    else:
+        stats = cache.stats()
+        print(f"{cache.path}: {stats['entries']} pages, {stats['bytes'] / 1024:.1f} KiB")
@@ -0,0 +1,93 @@
+'''
+utils/extract.py
+Single-pass HTML extraction for the Website classes.
+
+The previous extractor built a full BeautifulSoup tree, walked it to decompose script/style tags,
+then walked it again for the text and once more for the links. extract_page gets the same title,
+text and links from one run of the stdlib event parser without building a tree.
+'''
+
+from html.parser import HTMLParser
+
+from bs4 import UnicodeDammit
+
+# Bump when extract_page's output changes; the apps put it in their page cache kind, so extracts
+# cached on disk by an older version are parsed again instead of being served
+EXTRACT_VERSION = 2
+
+# Tags whose contents never count as page text
+SKIP_TAGS = {"script", "style", "noscript", "template"}
+
+
+class _PageParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = None
+        self.texts = []
+        self.links = []
+        self.anchors = {}   # href -> link text
+        self._title_parts = None
+        self._anchor = None     # (href, text parts) of the open <a>
+        self._in_body = False
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "body":
+            self._in_body = True
+        elif tag == "title" and self.title is None:
+            self._title_parts = []
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href and not href.startswith("mailto:"):
+                self.links.append(href)
+                self._anchor = (href, [])
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "body":
+            self._in_body = False
+        elif tag == "title" and self._title_parts is not None:
+            self.title = "".join(self._title_parts)
+            self._title_parts = None
+        elif tag == "a" and self._anchor is not None:
+            href, parts = self._anchor
+            text = " ".join(" ".join(parts).split())
+            if text and text not in self.anchors.get(href, ""):
+                self.anchors[href] = f"{self.anchors[href]} | {text}" if href in self.anchors else text
+            self._anchor = None
+
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+        elif self._in_body and not self._skip_depth:
+            text = data.strip()
+            if text:
+                self.texts.append(text)
+                if self._anchor is not None:
+                    self._anchor[1].append(text)
+
+
+def decode_html(content):
+    """Decode raw page bytes, trying UTF-8 before falling back to encoding detection."""
+    if isinstance(content, str):
+        return content
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        return UnicodeDammit(content, is_html=True).unicode_markup or ""
+
+
+def extract_page(content):
+    """Return {"title", "text", "links", "anchors"} for an HTML document given as bytes or str."""
+    parser = _PageParser()
+    parser.feed(decode_html(content))
+    parser.close()
+
+    if parser.title is None and parser._title_parts is not None:
+        parser.title = "".join(parser._title_parts)
+    title = parser.title.strip() if parser.title and parser.title.strip() else "No title found"
+
+    return {"title": title, "text": "\n".join(parser.texts), "links": parser.links, "anchors": parser.anchors}
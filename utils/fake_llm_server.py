@@ -0,0 +1,185 @@
+'''
+utils/fake_llm_server.py
+Local stand-in for an Ollama or OpenAI-compatible server that streams canned chunks.
+
+Speaks POST /api/chat (Ollama NDJSON), POST /v1/chat/completions (OpenAI SSE), and the Ollama
+model endpoints GET /api/tags, POST /api/pull and POST /api/generate (preload only), so the apps
+and utils/llm_client.py can be exercised without a model. POST /api/embed returns hashed
+bag-of-words vectors, so texts sharing words really are closer to each other. The reply text, first-token
+latency and token rate are configurable, and every request is counted.
+
+    python -m utils.fake_llm_server --port 11434 --tokens-per-sec 50 --first-token-latency 0.2
+'''
+
+import argparse
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = "This is a canned reply from the fake LLM server. " * 4
+EMBEDDING_DIM = 256
+
+
+def fake_embedding(text, dim=EMBEDDING_DIM):
+    vector = [0.0] * dim
+    for word in re.findall(r"\w+", text.lower()):
+        vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % dim] += 1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, reply=DEFAULT_REPLY, tokens_per_sec=0, first_token_latency=0.0,
+                 prefill_tokens_per_sec=0):
+        super().__init__((host, port), _Handler)
+        self.reply = reply  # text, or a function of the request messages returning text
+        self.tokens_per_sec = tokens_per_sec
+        self.first_token_latency = first_token_latency
+        self.prefill_tokens_per_sec = prefill_tokens_per_sec  # simulates prompt processing cost
+        self.requests = 0
+        self.models = ["fake"]
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def reply_for(self, messages):
+        return self.reply(messages) if callable(self.reply) else self.reply
+
+    def chunks(self, prompt_chars=0, reply=None):
+        """Reply split into word tokens, paced by first_token_latency, prefill and tokens_per_sec."""
+        prefill = prompt_chars / 4 / self.prefill_tokens_per_sec if self.prefill_tokens_per_sec else 0
+        time.sleep(self.first_token_latency + prefill)
+        for i, word in enumerate((reply or self.reply_for([])).split(" ")):
+            if i and self.tokens_per_sec:
+                time.sleep(1 / self.tokens_per_sec)
+            yield word if i == 0 else " " + word
+
+    def start(self):
+        """Serve on a daemon thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_stream(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"model": m, "name": m} for m in self.server.models]})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.server._lock:
+            self.server.requests += 1
+        model = request.get("model", "fake")
+        # Ollama streams unless told not to; the OpenAI API only streams when asked
+        stream = request.get("stream", self.path.startswith("/api/"))
+        messages = request.get("messages", [])
+        prompt_chars = sum(len(m.get("content") or "") for m in messages)
+
+        try:
+            if self.path == "/api/chat":
+                self._ollama_chat(model, stream, prompt_chars, self.server.reply_for(messages))
+            elif self.path.endswith("/chat/completions"):
+                self._openai_chat(model, stream, prompt_chars, self.server.reply_for(messages))
+            elif self.path == "/api/embed":
+                inputs = request.get("input", "")
+                inputs = [inputs] if isinstance(inputs, str) else inputs
+                self._send_json({"model": model, "embeddings": [fake_embedding(text) for text in inputs]})
+            elif self.path == "/api/generate":
+                self._send_json({"model": model, "response": "", "done": True})
+            elif self.path == "/api/pull":
+                self._ollama_pull(model)
+            else:
+                self.send_error(404)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client cancelled the stream
+
+    def _ollama_chat(self, model, stream, prompt_chars, reply):
+        if not stream:
+            reply = "".join(self.server.chunks(prompt_chars, reply))
+            self._send_json({"model": model, "message": {"role": "assistant", "content": reply}, "done": True})
+            return
+        self._start_stream("application/x-ndjson")
+        for token in self.server.chunks(prompt_chars, reply):
+            line = {"model": model, "message": {"role": "assistant", "content": token}, "done": False}
+            self._write_chunk(json.dumps(line).encode() + b"\n")
+        done = {"model": model, "message": {"role": "assistant", "content": ""}, "done": True}
+        self._write_chunk(json.dumps(done).encode() + b"\n")
+        self._write_chunk(b"")
+
+    def _ollama_pull(self, model):
+        self._start_stream("application/x-ndjson")
+        for completed in range(0, 101, 25):
+            progress = {"status": "pulling manifest", "digest": "sha256:fake", "total": 100, "completed": completed}
+            self._write_chunk(json.dumps(progress).encode() + b"\n")
+        self._write_chunk(json.dumps({"status": "success"}).encode() + b"\n")
+        self._write_chunk(b"")
+        with self.server._lock:
+            if model not in self.server.models:
+                self.server.models.append(model)
+
+    def _openai_chat(self, model, stream, prompt_chars, reply):
+        base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": model}
+        if not stream:
+            reply = "".join(self.server.chunks(prompt_chars, reply))
+            usage = {"prompt_tokens": (prompt_chars + 3) // 4, "completion_tokens": (len(reply) + 3) // 4}
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            self._send_json({**base, "object": "chat.completion", "usage": usage, "choices": [
+                {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": reply}}
+            ]})
+            return
+        self._start_stream("text/event-stream")
+        for token in self.server.chunks(prompt_chars, reply):
+            event = {**base, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Ollama/OpenAI streaming server")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--tokens-per-sec", type=float, default=0)
+    parser.add_argument("--first-token-latency", type=float, default=0.0)
+    parser.add_argument("--prefill-tokens-per-sec", type=float, default=0)
+    parser.add_argument("--reply", default=DEFAULT_REPLY)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(port=args.port, reply=args.reply, tokens_per_sec=args.tokens_per_sec,
+                           first_token_latency=args.first_token_latency,
+                           prefill_tokens_per_sec=args.prefill_tokens_per_sec)
+    print(f"Fake LLM server on {server.url}")
+    server.serve_forever()
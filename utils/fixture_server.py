@@ -0,0 +1,83 @@
+'''
+utils/fixture_server.py
+Local static HTTP server for saved website fixtures.
+
+Serves a directory of saved pages the way a small company site would: "/about" is answered from
+about.html (or about/index.html), pages carry Last-Modified so the page cache's conditional
+GETs get 304s, and an optional per-request latency stands in for a real network. Every request
+is counted per path, so benchmarks and crawler checks can see what was fetched.
+
+    python -m utils.fixture_server benchmarks/fixtures/site --port 8000 --latency 0.05
+'''
+
+import argparse
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, directory=os.path.join(FIXTURES_DIR, "site"), host="127.0.0.1", port=0, latency=0.0):
+        super().__init__((host, port), _Handler)
+        self.directory = directory
+        self.latency = latency
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    @property
+    def requests(self):
+        return sum(self.counts.values())
+
+    def start(self):
+        """Serve on a daemon thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=args[2].directory, **kwargs)
+
+    def log_message(self, *args):
+        pass
+
+    def translate_path(self, path):
+        # Extensionless links resolve to the saved .html file, also when a directory of subpages
+        # has the same name ("/careers" is careers.html, "/careers/x" is careers/x.html)
+        translated = super().translate_path(path)
+        page = translated.rstrip(os.sep) + ".html"
+        if not os.path.isfile(translated) and not os.path.isfile(os.path.join(translated, "index.html")) \
+                and os.path.isfile(page):
+            return page
+        return translated
+
+    def send_head(self):
+        with self.server._lock:
+            path = self.path.split("?", 1)[0]
+            self.server.counts[path] = self.server.counts.get(path, 0) + 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        return super().send_head()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Static server for saved website fixtures")
+    parser.add_argument("directory", nargs="?", default=os.path.join(FIXTURES_DIR, "site"))
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    args = parser.parse_args()
+
+    server = FixtureServer(args.directory, port=args.port, latency=args.latency)
+    print(f"Serving {args.directory} on {server.url}")
+    server.serve_forever()
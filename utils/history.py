@@ -0,0 +1,123 @@
+'''
+utils/history.py
+Token-budgeted chat history with a rolling summary of older turns.
+
+ChatHistory keeps recent messages verbatim while they fit in a token budget. Once they don't,
+the oldest turns are folded into a running summary by a background LLM call, and the request
+sent to the model becomes [summary, recent turns...].
+
+Folding is done in large steps (down to low_water of the budget) rather than one turn at a
+time, so the request prefix stays byte-identical for many turns in a row and the server can keep
+reusing its KV cache for it. It only changes at a fold.
+'''
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.tokens import estimate_tokens
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an assistant. "
+    "Merge the previous summary with the new turns into one concise summary that keeps names, "
+    "facts, decisions and open questions. Reply with the summary only."
+)
+
+
+def build_summary_request(summary, messages):
+    """Messages asking a model to fold messages into the previous summary."""
+    turns = "\n\n".join(f"{m['role'].upper()}: {m['content']}" for m in messages)
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Previous summary:\n{summary or '(none)'}\n\nNew turns:\n{turns}"},
+    ]
+
+
+class ChatHistory:
+    """
+    Conversation history that stays under max_tokens.
+
+    complete(messages) -> str is the blocking LLM call used to write summaries; it runs on a
+    background thread so the chat itself never waits for it.
+    """
+
+    def __init__(self, max_tokens, complete, low_water=0.5):
+        self.max_tokens = max_tokens
+        self.low_water = low_water
+        self.complete = complete
+        self.summary = ""
+        self._messages = []  # (message, tokens)
+        self._folding = False
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-summary")
+
+    def __len__(self):
+        return len(self._messages)
+
+    @property
+    def tokens(self):
+        summary_tokens = estimate_tokens(self.summary) if self.summary else 0
+        return summary_tokens + sum(tokens for _, tokens in self._messages)
+
+    def append(self, message):
+        with self._lock:
+            self._messages.append((message, estimate_tokens(message["content"])))
+            self._maybe_fold()
+
+    def drop_question(self):
+        """Remove the newest message if it is a question without an answer, e.g. after a failed request."""
+        with self._lock:
+            if self._messages and self._messages[-1][0]["role"] == "user":
+                self._messages.pop()
+
+    def messages(self):
+        """The messages to send with the next request."""
+        with self._lock:
+            recent = [message for message, _ in self._messages]
+            if not self.summary:
+                return recent
+            return [{"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"}] + recent
+
+    def clear(self):
+        with self._lock:
+            self._messages = []
+            self.summary = ""
+            self._generation += 1
+
+    # Called with the lock held
+    def _maybe_fold(self):
+        if self._folding or self.tokens <= self.max_tokens:
+            return
+
+        # Fold the oldest turns until the rest fits under low_water, cutting before a user message
+        # so question/answer pairs stay together, and always keeping the newest message
+        target = self.max_tokens * self.low_water
+        remaining = self.tokens
+        count = 0
+        for i, (message, tokens) in enumerate(self._messages[:-1]):
+            if remaining <= target and message["role"] == "user":
+                break
+            remaining -= tokens
+            count = i + 1
+        if not count:
+            return
+
+        self._folding = True
+        folded = [message for message, _ in self._messages[:count]]
+        self._executor.submit(self._fold, folded, self.summary, self._generation)
+
+    def _fold(self, folded, summary, generation):
+        try:
+            new_summary = self.complete(build_summary_request(summary, folded)).strip()
+        except Exception as e:
+            logging.warning(f"History summary failed: {e}")
+            new_summary = None
+
+        with self._lock:
+            self._folding = False
+            if generation != self._generation or not new_summary:
+                return
+            self.summary = new_summary
+            del self._messages[:len(folded)]
+            self._maybe_fold()
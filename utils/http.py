@@ -0,0 +1,153 @@
+'''
+utils/http.py
+Shared HTTP helpers: one pooled keep-alive session for every scraper, a bounded-concurrency
+fetch stage that runs page downloads in parallel while keeping their original order, and link
+normalization shared by link selection and the crawler.
+'''
+
+import contextvars
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import parse_qsl, urldefrag, urlencode, urljoin, urlparse, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# User-Agent header for website scraping
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36"
+}
+
+# Keep-alive connections kept open per host by the shared session
+POOL_SIZE = 16
+
+# Links with these extensions are files, not pages
+ASSET_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico", ".css", ".js",
+                    ".zip", ".gz", ".mp3", ".mp4", ".mov", ".xml", ".json", ".rss")
+
+_session = None
+_session_lock = threading.Lock()
+
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide requests.Session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _session = session
+    return _session
+
+
+# One semaphore per host so a single site is never hit with the whole pool at once
+def _host_slot(url, per_host):
+    host = urlparse(url).netloc.lower()
+    with _host_slots_lock:
+        key = (host, per_host)
+        if key not in _host_slots:
+            _host_slots[key] = threading.BoundedSemaphore(per_host)
+        return _host_slots[key]
+
+
+def fetch_all(urls, fetch, max_workers=8, per_host=2, deadline=20):
+    """
+    Call fetch(url) for every url on a thread pool and return the results in input order.
+
+    At most max_workers fetches run at once and at most per_host of them target the same host.
+    Everything must finish within deadline seconds; slow or failing fetches yield None in their
+    slot instead of holding up the rest.
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+
+    started = time.monotonic()
+
+    def run(url):
+        with _host_slot(url, per_host):
+            # Skip work that was queued behind the deadline
+            if time.monotonic() - started > deadline:
+                return None
+            return fetch(url)
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(urls)))
+    # Each worker runs in a copy of the caller's context, so tracing spans join the caller's trace
+    futures = [executor.submit(contextvars.copy_context().run, run, url) for url in urls]
+    wait(futures, timeout=deadline)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for url, future in zip(urls, futures):
+        if not future.done():
+            logging.warning(f"Fetch exceeded deadline: {url}")
+            results.append(None)
+        elif future.cancelled():
+            results.append(None)
+        elif future.exception():
+            logging.warning(f"Fetch failed for {url}: {future.exception()}")
+            results.append(None)
+        else:
+            results.append(future.result())
+    return results
+
+
+# Resolve a link against the page and normalize it, or None for links that can't be pages
+def normalize_link(base_url, href):
+    url, _ = urldefrag(urljoin(base_url, href.strip()))
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return None
+    host = parts.hostname.lower()
+    if parts.port and parts.port != {"http": 80, "https": 443}[parts.scheme]:
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/") or "/"
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")])
+    return urlunsplit((parts.scheme, host, path, query, ""))
+
+
+def same_site(url, site_url):
+    host = urlsplit(url).hostname or ""
+    site = (urlsplit(site_url).hostname or "").removeprefix("www.")
+    return host.removeprefix("www.") == site or host.endswith("." + site)
+
+
+class PageCache:
+    """
+    Request-scoped memo of loaded pages.
+
+    Each url (ignoring its #fragment) is passed to loader at most once, even when several threads
+    ask for it at the same time. Failures are remembered too and re-raised on later lookups.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.loads = 0
+        self._pages = {}
+        self._url_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        key = urldefrag(url).url
+        with self._lock:
+            url_lock = self._url_locks.setdefault(key, threading.Lock())
+        with url_lock:
+            if key not in self._pages:
+                self.loads += 1
+                try:
+                    self._pages[key] = (self.loader(key), None)
+                except Exception as e:
+                    self._pages[key] = (None, e)
+            page, error = self._pages[key]
+        if error:
+            raise error
+        return page
@@ -0,0 +1,100 @@
+'''
+utils/images.py
+One-time preprocessing of images for vision models.
+
+prepare_image downsizes a photo to the model's input resolution, re-encodes it as JPEG and
+returns the base64 payload. Results are cached in memory by (path, mtime, size) so follow-up
+questions about the same image cost nothing, and on disk by content hash so reopening the same
+photo later skips the decode and re-encode as well.
+'''
+
+import base64
+import hashlib
+import io
+import os
+import threading
+
+from PIL import Image, ImageOps
+
+# LLaVA-style models tile images at 336px; anything above ~2x that is wasted bandwidth
+VISION_MAX_SIDE = 672
+JPEG_QUALITY = 85
+
+CACHE_DIR = os.environ.get(
+    "IMAGE_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "hands-on-llms", "images")
+)
+
+
+class PreparedImage:
+    def __init__(self, payload, original_bytes, size):
+        self.payload = payload              # base64 string sent to the model
+        self.original_bytes = original_bytes
+        self.size = size                    # (width, height) after downscaling
+
+    @property
+    def payload_bytes(self):
+        return len(self.payload)
+
+    @property
+    def original_payload_bytes(self):
+        # What base64-encoding the original file would have sent
+        return (self.original_bytes + 2) // 3 * 4
+
+
+_prepared = {}
+_lock = threading.Lock()
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _encode(path, max_side, quality):
+    with Image.open(path) as img:
+        # Let the JPEG decoder skip detail we are about to throw away
+        img.draft("RGB", (max_side, max_side))
+        img = ImageOps.exif_transpose(img)
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, "white")
+            background.paste(img, mask=img.getchannel("A"))
+            img = background
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=quality, optimize=True)
+        return base64.b64encode(buffer.getvalue()).decode("ascii"), img.size
+
+
+def prepare_image(path, max_side=VISION_MAX_SIDE, quality=JPEG_QUALITY):
+    """Return a PreparedImage for path, preprocessing it only if it changed since last time."""
+    stat = os.stat(path)
+    key = (os.path.realpath(path), stat.st_mtime_ns, stat.st_size, max_side, quality)
+
+    # One lock for all images: uploads are rare and this stops the upload warm-up and the first
+    # question from encoding the same file twice
+    with _lock:
+        if key in _prepared:
+            return _prepared[key]
+
+        cache_path = os.path.join(CACHE_DIR, f"{_file_hash(path)}-{max_side}-{quality}.b64")
+        if os.path.exists(cache_path):
+            with open(cache_path, encoding="ascii") as f:
+                width, height, payload = f.read().split(" ", 2)
+            size = (int(width), int(height))
+        else:
+            payload, size = _encode(path, max_side, quality)
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(cache_path, "w", encoding="ascii") as f:
+                f.write(f"{size[0]} {size[1]} {payload}")
+
+        prepared = PreparedImage(payload, stat.st_size, size)
+        _prepared[key] = prepared
+        return prepared
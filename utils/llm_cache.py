@@ -0,0 +1,166 @@
+'''
+utils/llm_cache.py
+Response cache for LLM calls, keyed by (backend, model, canonicalized messages, options).
+
+Lookups go through a list of tiers in order (an in-memory LRU, then a SQLite file by default);
+a hit in a slower tier is copied into the faster ones. Streaming callers get a cache hit
+replayed as a stream of text deltas, so UIs render it the same way as a live answer.
+'''
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_PATH = os.environ.get(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "hands-on-llms", "llm.sqlite3")
+)
+
+
+def cache_key(backend, model, messages, options=None):
+    """Stable hash of a chat request; key order and unset (None) fields do not matter."""
+    canonical = {
+        "backend": backend,
+        "model": model,
+        "messages": [
+            {k: v for k, v in sorted(dict(message).items()) if v is not None}
+            for message in messages
+        ],
+        "options": options or {},
+    }
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryTier:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+
+class SqliteTier:
+    def __init__(self, path=DEFAULT_PATH, ttl=None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if not row or (self.ttl and time.time() - row[1] > self.ttl):
+            return None
+        return row[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, value, time.time()))
+            self._db.commit()
+
+
+class ResponseCache:
+    def __init__(self, tiers):
+        self.tiers = list(tiers)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for faster in self.tiers[:i]:
+                    faster.set(key, value)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def complete(self, backend, model, messages, call, options=None):
+        """Return the cached answer text, or call() and cache what it returns."""
+        key = cache_key(backend, model, messages, options)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        value = call()
+        if value:
+            self.set(key, value)
+        return value
+
+    def stream(self, backend, model, messages, call, options=None):
+        """
+        Return an iterator of text deltas for the request.
+
+        On a miss call() is invoked right away and must return an iterator of text deltas; the
+        answer is cached only once that stream has been consumed to the end.
+        """
+        key = cache_key(backend, model, messages, options)
+        cached = self.get(key)
+        if cached is not None:
+            return replay(cached)
+        return self._record(key, call())
+
+    def _record(self, key, deltas):
+        parts = []
+        try:
+            for delta in deltas:
+                parts.append(delta)
+                yield delta
+        finally:
+            # Stop the underlying request if the consumer went away early
+            if hasattr(deltas, "close"):
+                deltas.close()
+        # Streams cancelled part-way (e.g. SyncStream.close) are not cached
+        if parts and getattr(deltas, "completed", True):
+            self.set(key, "".join(parts))
+
+
+# Split cached text back into word-sized deltas
+def replay(text):
+    for piece in re.findall(r"\s*\S+|\s+$", text):
+        yield piece
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Return the process-wide ResponseCache (memory LRU in front of SQLite at DEFAULT_PATH).
+
+    With LLM_CACHE=off in the environment it has no tiers, so every call goes to the model.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            enabled = os.environ.get("LLM_CACHE", "on").lower() not in ("off", "0", "false")
+            _cache = ResponseCache([MemoryTier(), SqliteTier()] if enabled else [])
+    return _cache
@@ -0,0 +1,229 @@
+'''
+utils/llm_client.py
+Async streaming chat backends with one interface over Ollama and OpenAI-compatible servers.
+
+Every backend exposes `stream(model, messages, options=None)`, an async generator of text
+deltas. It applies a per-chunk timeout, retries connection failures and overload responses with
+exponential backoff (only until the first delta has arrived, so output is never duplicated),
+and reuses one HTTP client per event loop.
+
+The GUI and Gradio apps are synchronous, so stream_chat() runs the stream on a single shared
+background event loop and hands back a blocking iterator; close() on that iterator cancels the
+request on the server side. Any number of concurrent streams share the one loop thread.
+'''
+
+import asyncio
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+import httpx
+
+from utils import tracing
+
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+KEEP_ALIVE = "30m"  # how long Ollama keeps a model loaded after each request
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class ChatBackend:
+    name = None
+
+    def __init__(self, timeout=60.0, retries=2, backoff=0.5):
+        self.timeout = timeout    # seconds to wait for the first or any next chunk
+        self.retries = retries
+        self.backoff = backoff
+        self._clients = {}
+
+    # Backend-specific: async generator of text deltas for one request; server-reported token
+    # counts and timings go into stats (a dict) when one is given
+    async def _open(self, client, model, messages, options, stats):
+        raise NotImplementedError
+
+    def _new_client(self):
+        raise NotImplementedError
+
+    def _retryable(self, error):
+        return isinstance(error, (asyncio.TimeoutError, httpx.TransportError))
+
+    # httpx clients are bound to the loop they were first used on
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._clients:
+            self._clients[loop] = self._new_client()
+        return self._clients[loop]
+
+    async def stream(self, model, messages, options=None, stats=None):
+        attempt = 0
+        while True:
+            received = False
+            deltas = self._open(self._client(), model, messages, options, stats)
+            try:
+                while True:
+                    try:
+                        delta = await asyncio.wait_for(anext(deltas), self.timeout)
+                    except StopAsyncIteration:
+                        return
+                    received = True
+                    yield delta
+            except Exception as e:
+                if received or attempt >= self.retries or not self._retryable(e):
+                    raise
+                attempt += 1
+                delay = self.backoff * 2 ** (attempt - 1) * (1 + random.random())
+                logging.warning(f"{self.name} request failed ({e!r}); retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            finally:
+                await deltas.aclose()
+
+
+class OllamaBackend(ChatBackend):
+    name = "ollama"
+
+    def __init__(self, host=OLLAMA_HOST, keep_alive=KEEP_ALIVE, **kwargs):
+        super().__init__(**kwargs)
+        self.host = host
+        self.keep_alive = keep_alive
+
+    def _new_client(self):
+        import ollama
+        return ollama.AsyncClient(host=self.host, timeout=self.timeout)
+
+    def _retryable(self, error):
+        import ollama
+        if isinstance(error, ollama.ResponseError):
+            return error.status_code in RETRY_STATUS
+        return super()._retryable(error)
+
+    async def _open(self, client, model, messages, options, stats):
+        stream = await client.chat(
+            model=model, messages=messages, options=options, stream=True, keep_alive=self.keep_alive
+        )
+        async for chunk in stream:
+            content = chunk.get("message", {}).get("content", "")
+            if content:
+                yield content
+            if stats is not None and chunk.get("done"):
+                stats.update({key: chunk.get(key) for key in tracing.OLLAMA_STATS if chunk.get(key) is not None})
+
+
+class OpenAIBackend(ChatBackend):
+    name = "openai"
+
+    def __init__(self, api_key=None, base_url=None, **kwargs):
+        super().__init__(**kwargs)
+        self.api_key = api_key
+        self.base_url = base_url
+
+    def _new_client(self):
+        from openai import AsyncOpenAI
+        # Retries are handled here so they stop once output has started
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, timeout=self.timeout, max_retries=0)
+
+    def _retryable(self, error):
+        import openai
+        if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+            return True
+        return super()._retryable(error)
+
+    async def _open(self, client, model, messages, options, stats):
+        stream = await client.chat.completions.create(model=model, messages=messages, stream=True, **(options or {}))
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                # Only sent when the caller asks for it with stream_options={"include_usage": True}
+                if stats is not None and getattr(chunk, "usage", None):
+                    stats.update(prompt_eval_count=chunk.usage.prompt_tokens, eval_count=chunk.usage.completion_tokens)
+        finally:
+            await stream.close()
+
+
+class _LoopThread:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="llm-client-loop", daemon=True).start()
+
+
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """Return the shared background event loop, starting its thread on first use."""
+    global _loop_thread
+    with _loop_lock:
+        if _loop_thread is None:
+            _loop_thread = _LoopThread()
+    return _loop_thread.loop
+
+
+class SyncStream:
+    """Blocking iterator over a backend stream running on the shared loop."""
+
+    def __init__(self, backend, model, messages, options=None):
+        self._queue = queue.Queue()
+        self._finished = False
+        self.completed = False  # True only once the server finished the answer
+        self.stats = {}         # token counts and timings reported by the server
+        # "llm.stream" span from request to the end of consumption, only while tracing is on
+        self._span = tracing.span("llm.stream", backend=backend.name, model=model) if tracing.is_enabled() else None
+        self._tokens = 0
+        self._ttft = None
+        self._future = asyncio.run_coroutine_threadsafe(
+            self._pump(backend.stream(model, messages, options, self.stats)), get_loop()
+        )
+
+    async def _pump(self, deltas):
+        try:
+            async for delta in deltas:
+                self._queue.put(("delta", delta))
+            self._queue.put(("done", None))
+        except asyncio.CancelledError:
+            self._queue.put(("cancelled", None))
+            raise
+        except Exception as e:
+            self._queue.put(("error", e))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._finished:
+            raise StopIteration
+        kind, value = self._queue.get()
+        if kind == "delta":
+            if self._span:
+                if self._ttft is None:
+                    self._ttft = time.perf_counter() - self._span.start
+                self._tokens += 1
+            return value
+        self._finished = True
+        self.completed = kind == "done"
+        self._end_span(value if kind == "error" else None)
+        if kind == "error":
+            raise value
+        raise StopIteration
+
+    def close(self):
+        """Cancel the request; the iterator ends at once, dropping deltas not yet consumed."""
+        self._future.cancel()
+        self._finished = True
+        self._queue.put(("cancelled", None))
+        self._end_span()
+
+    def _end_span(self, error=None):
+        span, self._span = self._span, None
+        if span:
+            span.set(ttft=self._ttft, deltas=self._tokens, completed=self.completed, **self.stats)
+            span.end(error)
+            tracing.record_llm(span.attrs["backend"], span.attrs["model"], self._ttft, self._tokens, self.stats)
+
+
+def stream_chat(backend, model, messages, options=None):
+    """Start a streaming chat request and return a SyncStream of text deltas."""
+    return SyncStream(backend, model, messages, options)
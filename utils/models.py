@@ -0,0 +1,127 @@
+'''
+utils/models.py
+Non-blocking model readiness for the Ollama apps.
+
+ModelWarmup checks in a background thread that a model is pulled (pulling it with progress if
+not) and then preloads it into memory with a keep-alive request, so the first real question
+doesn't pay the model load time. The chat requests send the same keep_alive (llm_client's
+KEEP_ALIVE), which keeps the model loaded between questions. The apps show warmup.status in
+their status bar while it runs.
+
+The list of models known to be pulled is cached on disk for KNOWN_MODELS_TTL, so a normal launch
+makes no list round trip at all; only the preload request.
+'''
+
+import json
+import os
+import threading
+import time
+
+import ollama
+
+from utils.llm_client import KEEP_ALIVE, OLLAMA_HOST
+
+KNOWN_MODELS_PATH = os.path.join(os.path.expanduser("~"), ".cache", "hands-on-llms", "models.json")
+KNOWN_MODELS_TTL = 24 * 3600
+
+_known_lock = threading.Lock()
+
+
+def normalize_model_name(name):
+    """'llava' and 'llava:latest' are the same model to Ollama."""
+    return name if ":" in name else f"{name}:latest"
+
+
+def _read_known():
+    try:
+        with open(KNOWN_MODELS_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def known_models(host=OLLAMA_HOST):
+    """Models cached as pulled on host, or None if the cache is missing or stale."""
+    with _known_lock:
+        entry = _read_known().get(host)
+    if not entry or time.time() - entry["checked_at"] > KNOWN_MODELS_TTL:
+        return None
+    return set(entry["models"])
+
+
+def remember_models(models, host=OLLAMA_HOST):
+    with _known_lock:
+        known = _read_known()
+        known[host] = {"models": sorted(models), "checked_at": time.time()}
+        os.makedirs(os.path.dirname(KNOWN_MODELS_PATH), exist_ok=True)
+        with open(KNOWN_MODELS_PATH, "w", encoding="utf-8") as f:
+            json.dump(known, f)
+
+
+class ModelWarmup:
+    """
+    Background check-pull-preload of one model.
+
+    status is a human-readable progress line, ready is set when the work has finished, and error
+    holds the exception if it failed.
+    """
+
+    def __init__(self, model, host=OLLAMA_HOST, keep_alive=KEEP_ALIVE):
+        self.model = model
+        self.host = host
+        self.keep_alive = keep_alive
+        self.status = f"Checking model {model}..."
+        self.error = None
+        self.ready = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, name=f"warmup-{self.model}", daemon=True).start()
+        return self
+
+    def _run(self):
+        client = ollama.Client(host=self.host)
+        try:
+            try:
+                self._prepare(client, use_cache=True)
+            except ollama.ResponseError as e:
+                # The cached list said the model was there but it has since been removed
+                if e.status_code != 404:
+                    raise
+                self._prepare(client, use_cache=False)
+            self.status = f"{self.model} is ready."
+        except Exception as e:
+            self.error = e
+            self.status = f"Model {self.model} is not available: {e}"
+        finally:
+            self.ready.set()
+
+    def _prepare(self, client, use_cache):
+        name = normalize_model_name(self.model)
+        known = known_models(self.host) if use_cache else None
+        if known is None or name not in known:
+            known = {normalize_model_name(m["model"]) for m in client.list()["models"]}
+            if name not in known:
+                self._pull(client)
+                known.add(name)
+            remember_models(known, self.host)
+
+        self.status = f"Loading {self.model} into memory..."
+        # An empty prompt only loads the model; every later request renews the keep_alive
+        client.generate(model=self.model, prompt="", keep_alive=self.keep_alive)
+
+    def _pull(self, client):
+        for progress in client.pull(self.model, stream=True):
+            if progress.get("total") and progress.get("completed") is not None:
+                percent = progress["completed"] / progress["total"] * 100
+                self.status = f"Pulling {self.model}: {progress['status']} {percent:.0f}%"
+            else:
+                self.status = f"Pulling {self.model}: {progress['status']}"
+
+
+def show_warmup_progress(root, warmup, set_status, interval_ms=250):
+    """Mirror warmup.status into a Tk status widget from the Tk main loop until it finishes."""
+    def poll():
+        set_status(warmup.status)
+        if not warmup.ready.is_set():
+            root.after(interval_ms, poll)
+    poll()
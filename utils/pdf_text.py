@@ -0,0 +1,148 @@
+'''
+utils/pdf_text.py
+Parallel, streaming text extraction from PDFs.
+
+iter_pages spreads the pages of a PDF over a process pool (pdfplumber's layout analysis is pure
+Python and CPU bound, so threads don't help) and yields (page_number, text) in page order as soon
+as each page is ready, so callers can start working on the first pages while later ones are
+still being extracted. Only a few batches are in flight at a time, so memory doesn't grow with
+the page count.
+
+Extracted text is cached on disk per (file hash, page), so reopening the same paper, even under a
+different name, skips pdfplumber entirely for the pages already seen.
+'''
+
+import hashlib
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pdfplumber
+
+CACHE_DIR = os.environ.get(
+    "PDF_TEXT_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "hands-on-llms", "pdf_text")
+)
+PAGES_PER_TASK = 2
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_path(file_hash, page_number):
+    return os.path.join(CACHE_DIR, file_hash, f"{page_number}.txt")
+
+
+def _read_cached(file_hash, page_number):
+    try:
+        with open(_cache_path(file_hash, page_number), encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_cached(file_hash, page_number, text):
+    path = _cache_path(file_hash, page_number)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename, so a reader never sees half a page
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(path), delete=False) as f:
+        f.write(text)
+    os.replace(f.name, path)
+
+
+def page_count(path):
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pages(path, page_numbers):
+    """Text of the given 0-based pages. Runs in the worker processes."""
+    with pdfplumber.open(path) as pdf:
+        texts = []
+        for number in page_numbers:
+            page = pdf.pages[number]
+            texts.append(page.extract_text() or "")
+            # pdfplumber keeps every parsed object on the page; drop it before the next one
+            page.flush_cache()
+        return texts
+
+
+def iter_pages(pdf, workers=None, use_cache=True):
+    """
+    Yield (page_number, text) for every page of pdf, in order.
+
+    pdf is a path, the PDF's bytes or a file object such as an upload's BytesIO. workers=1
+    extracts in this process; the default uses one process per CPU.
+    """
+    temp_path = None
+    if hasattr(pdf, "read"):
+        pdf = pdf.read()
+    if isinstance(pdf, (bytes, bytearray)):
+        # Worker processes need something they can open themselves
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+            f.write(pdf)
+        pdf = temp_path = f.name
+
+    try:
+        file_hash = _file_hash(pdf)
+        numbers = range(page_count(pdf))
+        cached = {n: _read_cached(file_hash, n) for n in numbers} if use_cache else {}
+        missing = [n for n in numbers if cached.get(n) is None]
+        batches = [missing[i:i + PAGES_PER_TASK] for i in range(0, len(missing), PAGES_PER_TASK)]
+        workers = min(workers or os.cpu_count() or 1, len(batches)) or 1
+
+        if workers == 1:
+            extracted = ((batch, extract_pages(pdf, batch)) for batch in batches)
+            yield from _in_order(numbers, cached, extracted, file_hash, use_cache)
+            return
+
+        with ProcessPoolExecutor(workers) as pool:
+            extracted = _bounded_map(pool, pdf, batches, window=workers * 2)
+            yield from _in_order(numbers, cached, extracted, file_hash, use_cache)
+    finally:
+        if temp_path:
+            os.unlink(temp_path)
+
+
+def _bounded_map(pool, path, batches, window):
+    # Keep at most window batches submitted, so finished text waits in memory only briefly
+    batches = iter(batches)
+    pending = deque()
+
+    def submit():
+        batch = next(batches, None)
+        if batch is not None:
+            pending.append((batch, pool.submit(extract_pages, path, batch)))
+
+    for _ in range(window):
+        submit()
+    while pending:
+        batch, future = pending.popleft()
+        texts = future.result()
+        submit()
+        yield batch, texts
+
+
+def _in_order(numbers, cached, extracted, file_hash, use_cache):
+    for number in numbers:
+        if cached.get(number) is not None:
+            yield number, cached.pop(number)
+            continue
+        # Batches arrive in page order, so the next one always holds this page
+        batch, texts = next(extracted)
+        for batch_number, text in zip(batch, texts):
+            if use_cache:
+                _write_cached(file_hash, batch_number, text)
+            cached[batch_number] = text
+        yield number, cached.pop(number)
+
+
+def pdf_text(pdf, workers=None):
+    """The whole text of pdf, pages joined by newlines."""
+    return "\n".join(text for _, text in iter_pages(pdf, workers))
@@ -0,0 +1,44 @@
+'''
+utils/ratelimit.py
+Client-side rate limiting for hosted LLM APIs.
+'''
+
+import threading
+import time
+from collections import deque
+
+WINDOW = 60.0  # seconds; API limits are quoted per minute
+
+
+class RateLimiter:
+    """
+    Sliding-window limiter for requests per minute and tokens per minute.
+
+    acquire(tokens) blocks the calling thread until sending a request of that size keeps both
+    limits, so a worker pool can't trip the API's 429s on its own. None disables a limit.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._sent = deque()  # (timestamp, tokens)
+        self._tokens = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=0):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._sent and now - self._sent[0][0] >= WINDOW:
+                    self._tokens -= self._sent.popleft()[1]
+
+                requests_ok = not self.requests_per_minute or len(self._sent) < self.requests_per_minute
+                # A request larger than the whole budget is let through on an empty window
+                tokens_ok = (not self.tokens_per_minute or not self._sent
+                             or self._tokens + tokens <= self.tokens_per_minute)
+                if requests_ok and tokens_ok:
+                    self._sent.append((now, tokens))
+                    self._tokens += tokens
+                    return
+                wait = WINDOW - (now - self._sent[0][0])
+            time.sleep(max(wait, 0.05))
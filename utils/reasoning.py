@@ -0,0 +1,94 @@
+'''
+utils/reasoning.py
+Separates reasoning-model <think> blocks from the answer in a streamed reply.
+
+Models such as deepseek-r1 stream their chain of thought inline between <think> and </think>.
+ThinkFilter splits each delta into reasoning and answer text as it arrives. Only a possible
+partial tag at the end of a chunk is held back until the next one, so tags split across chunks
+are still recognized and no text is scanned twice.
+'''
+
+from utils.tokens import estimate_tokens
+
+OPEN_TAG = "<think>"
+CLOSE_TAG = "</think>"
+
+
+def _partial_tag_length(text, tags):
+    """Length of the longest suffix of text that is the start of one of tags."""
+    for n in range(min(len(text), max(map(len, tags)) - 1), 0, -1):
+        if any(tag.startswith(text[-n:]) for tag in tags):
+            return n
+    return 0
+
+
+class ThinkFilter:
+    """
+    Incremental <think> splitter for one answer.
+
+    feed(delta) returns (reasoning, answer) for the text it can decide on; flush() returns the
+    rest at the end of the stream. A stray </think> outside a block is dropped, and whitespace
+    right after a block is not counted as answer.
+    """
+
+    def __init__(self):
+        self.thinking = False
+        self._reasoning = []
+        self._pending = ""
+        self._after_block = False
+
+    @property
+    def reasoning(self):
+        """All reasoning text seen so far."""
+        return "".join(self._reasoning)
+
+    @property
+    def reasoning_tokens(self):
+        return estimate_tokens(self.reasoning) if self._reasoning else 0
+
+    def feed(self, delta):
+        text = self._pending + delta
+        self._pending = ""
+        reasoning, answer = [], []
+        while text:
+            tags = (CLOSE_TAG,) if self.thinking else (OPEN_TAG, CLOSE_TAG)
+            found = [(index, tag) for tag in tags for index in [text.find(tag)] if index >= 0]
+            if found:
+                index, tag = min(found)
+                self._emit(text[:index], reasoning, answer)
+                text = text[index + len(tag):]
+                if tag == OPEN_TAG:
+                    self.thinking = True
+                elif self.thinking:
+                    self.thinking = False
+                    self._after_block = True
+                continue
+            keep = _partial_tag_length(text, tags)
+            self._emit(text[:len(text) - keep], reasoning, answer)
+            self._pending = text[len(text) - keep:]
+            break
+        return "".join(reasoning), "".join(answer)
+
+    def flush(self):
+        text, self._pending = self._pending, ""
+        reasoning, answer = [], []
+        self._emit(text, reasoning, answer)
+        return "".join(reasoning), "".join(answer)
+
+    def _emit(self, text, reasoning, answer):
+        if self.thinking:
+            self._reasoning.append(text)
+            reasoning.append(text)
+            return
+        if self._after_block:
+            text = text.lstrip()
+            self._after_block = not text
+        answer.append(text)
+
+
+def split_think(text):
+    """(reasoning, answer) of a complete reply."""
+    think = ThinkFilter()
+    reasoning, answer = think.feed(text)
+    rest = think.flush()
+    return reasoning + rest[0], answer + rest[1]
@@ -0,0 +1,90 @@
+'''
+utils/render.py
+Incremental Markdown rendering and update throttling for streamed answers.
+
+Re-rendering the whole accumulated answer for every delta costs O(n^2) in the answer length.
+IncrementalMarkdown renders each finished block (text up to a blank line that is not inside a
+code fence and is not followed by a continuation of the same list, quote or indented block)
+once and keeps its HTML; only the open block at the end is rendered again on each html() call.
+
+Blocks are rendered separately, so reference-style link definitions only apply within their own
+block. LLM answers rarely use them.
+'''
+
+import re
+import time
+
+from markdown import markdown
+
+BLANK_LINE = re.compile(r"\n[ \t]*\n")
+FENCE = re.compile(r"^ {0,3}(```|~~~)", re.MULTILINE)
+LIST_ITEM = re.compile(r"^ {0,3}([-*+]|\d+[.)])\s")
+
+
+def _continues(block, next_line):
+    """Whether next_line, after a blank line, still belongs to block's list, quote or indent."""
+    if next_line[:1] in (" ", "\t"):
+        return True
+    last_line = block.rsplit("\n", 1)[-1]
+    if LIST_ITEM.match(next_line):
+        return bool(LIST_ITEM.match(last_line) or last_line[:1] in (" ", "\t"))
+    return next_line.startswith(">") and last_line.lstrip().startswith(">")
+
+
+class IncrementalMarkdown:
+    """
+    Markdown rendered block by block as text streams in.
+
+    strip_fences removes ``` from the text (what the brochure generator does), even when the
+    three backticks arrive in different deltas.
+    """
+
+    def __init__(self, strip_fences=False):
+        self.strip_fences = strip_fences
+        self.blocks = 0
+        self._html = ""    # rendered finished blocks
+        self._tail = ""
+
+    def feed(self, delta):
+        tail = self._tail + delta
+        self._tail = tail.replace("```", "") if self.strip_fences else tail
+        self._commit()
+
+    def _commit(self):
+        start = 0
+        for match in BLANK_LINE.finditer(self._tail):
+            block = self._tail[start:match.start()]
+            rest = self._tail[match.end():]
+            # The next line must be complete to know whether it continues the block
+            if "\n" not in rest.lstrip("\n"):
+                break
+            next_line = rest.lstrip("\n").split("\n", 1)[0]
+            if len(FENCE.findall(block)) % 2 or _continues(block, next_line):
+                continue
+            if block.strip():
+                self._html += ("\n" if self._html else "") + markdown(block)
+                self.blocks += 1
+            start = match.end()
+        if start:
+            self._tail = self._tail[start:]
+
+    def html(self):
+        """HTML of everything fed so far."""
+        if not self._tail.strip():
+            return self._html
+        return self._html + ("\n" if self._html else "") + markdown(self._tail)
+
+
+class Throttle:
+    """due() is true at most once per interval, and on its first call."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next = 0.0
+
+    def due(self):
+        now = time.monotonic()
+        if now < self._next:
+            return False
+        self._next = now + self.interval
+        return True
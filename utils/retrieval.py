@@ -0,0 +1,232 @@
+'''
+utils/retrieval.py
+Local semantic retrieval over scraped pages and documents.
+
+Documents are cut into small line-aligned chunks, embedded through Ollama's /api/embed in
+batches, and stored in a VectorIndex: unit-length float32 rows in a memory-mapped file plus a
+JSON list of chunk metadata, so cosine similarity is a single matrix-vector product and the
+index costs almost no RAM until it is searched.
+
+Adding a document is incremental. Chunks whose text is already indexed for that source keep
+their vectors and cost no embedding call; chunks that disappeared are dropped; only new text is
+embedded and appended to the end of the vector file.
+'''
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import ollama
+
+from utils.llm_client import OLLAMA_HOST
+from utils.tokens import estimate_tokens
+
+EMBED_MODEL = "nomic-embed-text"
+EMBED_BATCH = 32
+CHUNK_TOKENS = 200
+INDEX_DIR = os.environ.get(
+    "RETRIEVAL_INDEX_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "hands-on-llms", "index")
+)
+
+
+def chunk_text(text, max_tokens=CHUNK_TOKENS):
+    """Cut text into chunks of whole lines of at most max_tokens; longer lines are split."""
+    chunks, current = [], []
+    size = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        while estimate_tokens(line) > max_tokens:
+            chunks.append(line[:max_tokens * 4])
+            line = line[max_tokens * 4:]
+        cost = estimate_tokens(line) + 1
+        if current and size + cost > max_tokens:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += cost
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class VectorIndex:
+    """
+    Append-only vector store in a directory: vectors.f32 (rows of dim float32) and chunks.json.
+
+    Removed chunks keep their row, marked with source None, and are skipped by search().
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._chunks_path = os.path.join(directory, "chunks.json")
+        self._lock = threading.Lock()
+        self.dim = None
+        self.chunks = []    # {"source", "position", "sha256", "text"}
+        self._matrix = None
+        try:
+            with open(self._chunks_path, encoding="utf-8") as f:
+                saved = json.load(f)
+            self.dim, self.chunks = saved["dim"], saved["chunks"]
+        except (OSError, ValueError):
+            pass
+        # Vectors written by an update that never got to save its chunks don't belong to any row
+        if os.path.exists(self._vectors_path):
+            size = len(self.chunks) * (self.dim or 0) * 4
+            if os.path.getsize(self._vectors_path) > size:
+                os.truncate(self._vectors_path, size)
+
+    def __len__(self):
+        return sum(1 for chunk in self.chunks if chunk["source"] is not None)
+
+    def rows(self, source):
+        """{sha256: row} of the live chunks of source."""
+        return {c["sha256"]: row for row, c in enumerate(self.chunks) if c["source"] == source}
+
+    def update(self, source, texts, vectors):
+        """
+        Make source consist of texts, in order. vectors holds embeddings for the texts not yet
+        indexed for source (in order of first appearance), as returned by missing().
+        """
+        with self._lock:
+            existing = self.rows(source)
+            new_rows = []
+            kept = set()
+            for position, text in enumerate(texts):
+                sha = _digest(text)
+                if sha in existing:
+                    self.chunks[existing[sha]]["position"] = position
+                    kept.add(sha)
+                elif sha not in kept:
+                    new_rows.append({"source": source, "position": position, "sha256": sha, "text": text})
+                    kept.add(sha)
+            for sha, row in existing.items():
+                if sha not in kept:
+                    self.chunks[row] = {"source": None, "position": 0, "sha256": sha, "text": ""}
+
+            if new_rows:
+                matrix = np.asarray(vectors, dtype=np.float32).reshape(len(new_rows), -1)
+                # Unit-length rows make cosine similarity a plain dot product
+                matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+                if self.dim is None:
+                    self.dim = matrix.shape[1]
+                elif matrix.shape[1] != self.dim:
+                    raise ValueError(f"Embedding size {matrix.shape[1]} does not match the index ({self.dim})")
+                os.makedirs(self.directory, exist_ok=True)
+                with open(self._vectors_path, "ab") as f:
+                    f.write(matrix.tobytes())
+                self.chunks.extend(new_rows)
+                self._matrix = None
+            self._save()
+
+    def missing(self, source, texts):
+        """The distinct texts that have no vector for source yet, in order."""
+        with self._lock:
+            existing = self.rows(source)
+        missing = []
+        for text in texts:
+            sha = _digest(text)
+            if sha not in existing:
+                existing[sha] = None
+                missing.append(text)
+        return missing
+
+    def search(self, vector, k=5, sources=None):
+        """Top k (score, chunk) by cosine similarity, optionally only among the given sources."""
+        sources = set(sources) if sources is not None else None
+        with self._lock:
+            if not self.chunks:
+                return []
+            if self._matrix is None:
+                self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r",
+                                         shape=(len(self.chunks), self.dim))
+            rows = np.array([
+                row for row, c in enumerate(self.chunks)
+                if c["source"] is not None and (sources is None or c["source"] in sources)
+            ], dtype=np.int64)
+            matrix, chunks = self._matrix, self.chunks
+        if not len(rows):
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        query /= max(np.linalg.norm(query), 1e-12)
+        scores = matrix[rows] @ query
+        top = np.argsort(-scores)[:k] if len(rows) <= k else np.argpartition(-scores, k)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), chunks[rows[i]]) for i in top]
+
+    def _save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self._chunks_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "chunks": self.chunks}, f)
+        os.replace(temp_path, self._chunks_path)
+
+
+class Retriever:
+    """Chunks, embeds and indexes documents, and finds the chunks closest to a query."""
+
+    def __init__(self, index=None, model=EMBED_MODEL, host=OLLAMA_HOST, batch_size=EMBED_BATCH):
+        self.model = model
+        self.batch_size = batch_size
+        self.client = ollama.Client(host=host)
+        self.index = index or VectorIndex(os.path.join(INDEX_DIR, re.sub(r"[^\w.-]", "_", model)))
+        self.embedded = 0   # chunks sent to the embedding model
+        # One document at a time, so the vectors always match the chunks still missing
+        self._lock = threading.Lock()
+
+    def embed(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            vectors.extend(self.client.embed(model=self.model, input=batch)["embeddings"])
+            self.embedded += len(batch)
+        return vectors
+
+    def add_document(self, source, text):
+        """Index text under source (a URL or file hash), embedding only chunks not seen before."""
+        texts = chunk_text(text)
+        with self._lock:
+            self.index.update(source, texts, self.embed(self.index.missing(source, texts)))
+
+    def search(self, query, k=5, sources=None):
+        return self.index.search(self.embed([query])[0], k, sources)
+
+    def top_chunks(self, queries, k=5, sources=None):
+        """
+        Chunks among the top k for any of the queries, each once, in document order
+        (by source in the order given, then by position). Each chunk is a copy with "score", its
+        best similarity to any of the queries. All queries are embedded in one call.
+        """
+        queries = [queries] if isinstance(queries, str) else list(queries)
+        found = {}
+        for vector in self.embed(queries):
+            for score, chunk in self.index.search(vector, k, sources):
+                key = (chunk["source"], chunk["sha256"])
+                if key not in found or score > found[key]["score"]:
+                    found[key] = dict(chunk, score=score)
+        order = {source: i for i, source in enumerate(sources or [])}
+        return sorted(found.values(), key=lambda c: (order.get(c["source"], len(order)), c["position"]))
+
+
+_retriever = None
+_retriever_lock = threading.Lock()
+
+
+def get_retriever():
+    """Return the process-wide Retriever (EMBED_MODEL on OLLAMA_HOST, index under INDEX_DIR)."""
+    global _retriever
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = Retriever()
+    return _retriever
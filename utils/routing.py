@@ -0,0 +1,298 @@
+'''
+utils/routing.py
+Speculative routing of chat questions between a small fast model and a larger one.
+
+A Route names a fast model and optionally a strong one. RoutedStream sends the question to both
+at once on the shared client loop and shows whichever answer produces its first token first.
+If the fast model wins, the strong model may still take over while its first token arrives
+within switch_window seconds of the fast one's; the consumer then gets a "switch" event with the
+strong answer so far and the fast stream is cancelled. Every other losing stream is cancelled as
+soon as the decision is final, so it stops using local compute.
+
+Each routed question is recorded in RoutingStats (time to first token, total time and tokens/s
+per model, which model won and whether it switched), saved to STATS_PATH, so default routes can
+be tuned from data:
+
+    python -m utils.routing
+'''
+
+import json
+import os
+import queue
+import statistics
+import threading
+import time
+
+from utils import tracing
+from utils.llm_client import stream_chat
+
+STATS_PATH = os.environ.get(
+    "ROUTING_STATS_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "hands-on-llms", "routing.json")
+)
+MAX_SAMPLES = 200  # recent questions kept per model
+
+
+class Route:
+    """
+    A fast model, optionally raced against a strong one.
+
+    switch_window: seconds after the fast model's first token during which the strong model may
+    still take over; 0 makes it a pure race, None lets it take over until the fast answer ends.
+    """
+
+    def __init__(self, fast, strong=None, switch_window=2.0):
+        self.fast = fast
+        self.strong = strong
+        self.switch_window = switch_window
+
+    @property
+    def models(self):
+        return [self.fast, self.strong] if self.strong and self.strong != self.fast else [self.fast]
+
+    @property
+    def name(self):
+        return " > ".join(self.models)
+
+
+class RoutedStream:
+    """
+    Blocking iterator of (kind, value) events for one routed question: ("delta", text) continues
+    the shown answer, ("switch", text) replaces it with another model's answer so far.
+    """
+
+    def __init__(self, backend, route, messages, options=None, stats=None):
+        self.route = route
+        self.model = None        # model whose answer is shown
+        self.completed = False   # True only once the shown model finished its answer
+        self.switched = False
+        self._stats = stats
+        self._events = queue.Queue()
+        self._started = time.perf_counter()
+        self._decided_at = None
+        self._texts = {model: [] for model in route.models}
+        self._ttft = {}
+        self._ended = {}         # model -> seconds until it finished, failed or was cancelled
+        self._outcome = {}       # model -> "done", "cancelled" or "error"
+        self._dropped = set()
+        self._finished = False
+        self._finish_lock = threading.Lock()
+        self._streams = {}
+        for model in route.models:
+            stream = stream_chat(backend, model, messages, options)
+            self._streams[model] = stream
+            threading.Thread(target=self._pump, args=(model, stream), name=f"route-{model}", daemon=True).start()
+
+    def _pump(self, model, stream):
+        try:
+            for delta in stream:
+                self._events.put((model, "delta", delta))
+            self._events.put((model, "done" if stream.completed else "cancelled", None))
+        except Exception as e:
+            self._events.put((model, "error", e))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while not self._finished:
+            try:
+                model, kind, value = self._events.get(timeout=self._timeout())
+            except queue.Empty:
+                # The strong model missed the switch window
+                self._cancel(self.route.strong)
+                continue
+            if model in self._dropped:
+                continue
+            now = time.perf_counter() - self._started
+
+            if kind == "delta":
+                self._texts[model].append(value)
+                self._ttft.setdefault(model, now)
+                if self.model is None:
+                    return self._show(model, value)
+                if model == self.model:
+                    return "delta", value
+                if model == self.route.strong and self._can_switch():
+                    self.switched = True
+                    return self._show(model, value)
+                self._cancel(model)
+                continue
+
+            self._ended[model] = now
+            self._outcome[model] = kind
+            self._dropped.add(model)
+            if kind == "done" and (model == self.model or self.model is None):
+                self.model = model
+                self.completed = True
+                self._finish()
+                raise StopIteration
+            if kind == "error" and not self._alive():
+                self._finish()
+                raise value
+            if model == self.model:
+                # The shown model failed or was cut off; the other one takes over from its first token
+                self.model = None
+                live = [m for m in self._alive() if self._texts[m]]
+                if live:
+                    return self._show(live[0], "")
+        raise StopIteration
+
+    # Show model's answer from now on, cancelling the others once nothing can take over
+    def _show(self, model, delta):
+        shown_before = self._decided_at is not None
+        self.model = model
+        if not shown_before:
+            self._decided_at = time.perf_counter() - self._started
+        for other in self._alive():
+            if other != model and (model == self.route.strong or self.route.switch_window == 0):
+                self._cancel(other)
+        if shown_before:
+            return "switch", "".join(self._texts[model])
+        return "delta", delta
+
+    # Whether the strong model may still take over the fast model's answer
+    def _can_switch(self):
+        strong = self.route.strong
+        if self.model != self.route.fast or not strong or strong in self._dropped:
+            return False
+        window = self.route.switch_window
+        return window is None or time.perf_counter() - self._started - self._decided_at < window
+
+    # How long to wait for the next event: until the switch window closes, if one is open
+    def _timeout(self):
+        strong = self.route.strong
+        if (self.route.switch_window is None or self.model != self.route.fast or not strong
+                or strong in self._dropped):
+            return None
+        return max(0, self.route.switch_window - (time.perf_counter() - self._started - self._decided_at))
+
+    def _alive(self):
+        return [model for model in self.route.models if model not in self._dropped]
+
+    def _cancel(self, model):
+        if model and model not in self._dropped:
+            self._dropped.add(model)
+            self._ended[model] = time.perf_counter() - self._started
+            self._outcome[model] = "cancelled"
+            self._streams[model].close()
+
+    def close(self):
+        """Cancel every stream still running."""
+        self._finish()
+
+    # Runs once, from the consumer or from close()
+    def _finish(self):
+        with self._finish_lock:
+            if self._finished:
+                return
+            self._finished = True
+        for model in self._alive():
+            self._cancel(model)
+        if self._stats is not None:
+            self._stats.record(self)
+        if tracing.is_enabled():
+            tracing.increment("route_decisions_total", route=self.route.name, model=self.model or "none",
+                              switched=self.switched)
+
+    def samples(self):
+        """Per-model measurements of this question, for RoutingStats."""
+        samples = {}
+        for model in self.route.models:
+            stats = self._streams[model].stats
+            sample = {
+                "ttft": self._ttft.get(model),
+                "seconds": self._ended.get(model),
+                "deltas": len(self._texts[model]),
+                "outcome": self._outcome.get(model, "cancelled"),
+                "shown": model == self.model,
+            }
+            if stats.get("eval_count") and stats.get("eval_duration"):
+                sample["tokens_per_sec"] = stats["eval_count"] / (stats["eval_duration"] / 1e9)
+            samples[model] = sample
+        return samples
+
+
+class RoutingStats:
+    """Routing decisions and recent per-model latencies, kept in a JSON file."""
+
+    def __init__(self, path=STATS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {"routes": {}, "models": {}}
+
+    def record(self, stream):
+        route = stream.route.name
+        with self._lock:
+            decisions = self.data["routes"].setdefault(route, {"questions": 0, "won": {}, "switched": 0})
+            decisions["questions"] += 1
+            if stream.model:
+                decisions["won"][stream.model] = decisions["won"].get(stream.model, 0) + 1
+            decisions["switched"] += stream.switched
+            for model, sample in stream.samples().items():
+                samples = self.data["models"].setdefault(model, [])
+                samples.append({"at": time.time(), "route": route, **sample})
+                del samples[:-MAX_SAMPLES]
+            self._save()
+
+    def summary(self):
+        """{"routes": decision counts, "models": {model: median/p95 latencies}}."""
+        def quantiles(values):
+            values = sorted(v for v in values if v is not None)
+            if not values:
+                return None
+            return {"p50": statistics.median(values), "p95": values[max(0, int(len(values) * 0.95 + 0.5) - 1)]}
+
+        with self._lock:
+            data = json.loads(json.dumps(self.data))
+        models = {}
+        for model, samples in data["models"].items():
+            models[model] = {
+                "questions": len(samples),
+                "shown": sum(1 for s in samples if s["shown"]),
+                "ttft": quantiles(s["ttft"] for s in samples),
+                "seconds": quantiles(s["seconds"] for s in samples if s["outcome"] == "done"),
+                "tokens_per_sec": quantiles(s.get("tokens_per_sec") for s in samples),
+            }
+        return {"routes": data["routes"], "models": models}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.replace(temp_path, self.path)
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_routing_stats():
+    """Return the process-wide RoutingStats saved at STATS_PATH."""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = RoutingStats()
+    return _stats
+
+
+def stream_routed(backend, route, messages, options=None):
+    """Start a routed question and return its RoutedStream; decisions go to get_routing_stats()."""
+    return RoutedStream(backend, route, messages, options, get_routing_stats())
+
+
+if __name__ == "__main__":
+    summary = get_routing_stats().summary()
+    for route, decisions in summary["routes"].items():
+        won = ", ".join(f"{model} {count}" for model, count in decisions["won"].items())
+        print(f"{route}: {decisions['questions']} questions, won: {won}, switched {decisions['switched']}")
+    for model, stats in summary["models"].items():
+        print(f"\n{model}: {stats['questions']} questions, shown {stats['shown']}")
+        for key in ("ttft", "seconds", "tokens_per_sec"):
+            if stats[key]:
+                print(f"  {key:>15} p50 {stats[key]['p50']:.2f}  p95 {stats[key]['p95']:.2f}")
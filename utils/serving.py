@@ -0,0 +1,229 @@
+'''
+utils/serving.py
+Queueing and backpressure for the Gradio apps.
+
+- Stage: a FIFO concurrency limit for one pipeline stage (scraping, LLM). Jobs waiting for a
+  slot know their position, so the UI stream can show it.
+- JobServer: runs each job on its own thread and lets every request for the same key follow the
+  one job in flight instead of starting another, and caps how many jobs one client may follow.
+
+Jobs are generators whose every output is the full current state (a Markdown render so far), so
+a request that joins late simply starts from the latest output. Status lines such as queue
+positions are yielded as Progress strings, so measurements can tell them from content.
+'''
+
+import collections
+import threading
+import time
+
+from utils import tracing
+
+PROGRESS_INTERVAL = 0.5  # seconds between queue position updates
+
+
+class Progress(str):
+    """A status line in an output stream, as opposed to content."""
+
+
+class Ticket:
+    """A place in a Stage's queue; use it as a context manager to give the slot back."""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.admitted = False
+        self.released = False
+        self.joined_at = time.perf_counter()
+
+    @property
+    def position(self):
+        """Jobs ahead of this one in the queue (0 once admitted)."""
+        return self.stage._position(self)
+
+    def wait(self, timeout=None):
+        """Block until admitted or timeout; returns whether a slot was given."""
+        return self.stage._wait(self, timeout)
+
+    def queued(self, message, interval=PROGRESS_INTERVAL):
+        """Yield message.format(position=...) every interval until admitted; position 1 is next."""
+        while not self.wait(interval):
+            yield Progress(message.format(position=self.position + 1))
+
+    def release(self):
+        self.stage._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class Stage:
+    """At most limit jobs inside the stage at once; the rest wait in arrival order."""
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.active = 0
+        self._waiting = collections.deque()
+        self._cond = threading.Condition()
+
+    @property
+    def queued(self):
+        return len(self._waiting)
+
+    def join(self):
+        """Queue up for a slot and return the Ticket; it may be admitted at once."""
+        ticket = Ticket(self)
+        with self._cond:
+            self._waiting.append(ticket)
+            self._admit()
+        return ticket
+
+    def _admit(self):
+        while self._waiting and self.active < self.limit:
+            ticket = self._waiting.popleft()
+            ticket.admitted = True
+            self.active += 1
+            if tracing.is_enabled():
+                tracing.observe("stage_wait_seconds", time.perf_counter() - ticket.joined_at, stage=self.name)
+        self._cond.notify_all()
+
+    def _position(self, ticket):
+        with self._cond:
+            return 0 if ticket.admitted else self._waiting.index(ticket) if ticket in self._waiting else 0
+
+    def _wait(self, ticket, timeout):
+        with self._cond:
+            return self._cond.wait_for(lambda: ticket.admitted, timeout)
+
+    def _release(self, ticket):
+        with self._cond:
+            if ticket.released:
+                return
+            ticket.released = True
+            if ticket.admitted:
+                self.active -= 1
+            else:
+                self._waiting.remove(ticket)
+            self._admit()
+
+
+class TooManyJobs(Exception):
+    pass
+
+
+class _Job:
+    """One job running on its own thread; followers read its latest output."""
+
+    def __init__(self, key, produce, on_done):
+        self.key = key
+        self.value = None
+        self.seq = 0
+        self.done = False
+        self.cancelled = False
+        self.error = None
+        self.followers = 0
+        self._produce = produce
+        self._on_done = on_done
+        self._cond = threading.Condition()
+        threading.Thread(target=self._run, name=f"job-{key}", daemon=True).start()
+
+    def _run(self):
+        outputs = self._produce()
+        try:
+            for value in outputs:
+                with self._cond:
+                    if self.cancelled:
+                        break
+                    self.value = value
+                    self.seq += 1
+                    self._cond.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            # Closing the generator runs its cleanup, e.g. cancelling an LLM stream nobody reads
+            close = getattr(outputs, "close", None)
+            if close:
+                close()
+            with self._cond:
+                self.done = True
+                self._cond.notify_all()
+            self._on_done(self)
+
+    def follow(self):
+        seen = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self.seq > seen or self.done)
+                if self.seq > seen:
+                    value, seen = self.value, self.seq
+                elif self.error is not None:
+                    raise self.error
+                else:
+                    return
+            yield value
+
+
+class JobServer:
+    """
+    Coalesces identical in-flight jobs and caps the jobs each client follows.
+
+    stream(key, client, produce) starts produce() as a job unless one with the same key is still
+    running, and yields its outputs. A job nobody follows any more is cancelled at its next output.
+    """
+
+    def __init__(self, max_jobs_per_client=2):
+        self.max_jobs_per_client = max_jobs_per_client
+        self.coalesced = 0
+        self._jobs = {}
+        self._clients = collections.Counter()
+        self._lock = threading.Lock()
+
+    def stream(self, key, client, produce):
+        with self._lock:
+            if self._clients[client] >= self.max_jobs_per_client:
+                raise TooManyJobs(f"You already have {self._clients[client]} jobs running; "
+                                  "wait for one to finish before starting another.")
+            self._clients[client] += 1
+            job = self._jobs.get(key)
+            coalesced = job is not None
+            if coalesced:
+                self.coalesced += 1
+            else:
+                job = self._jobs[key] = _Job(key, produce, self._finished)
+            job.followers += 1
+        if tracing.is_enabled():
+            tracing.increment("jobs_total", coalesced=coalesced)
+        try:
+            yield from job.follow()
+        finally:
+            with self._lock:
+                self._clients[client] -= 1
+                if not self._clients[client]:
+                    del self._clients[client]
+                job.followers -= 1
+                if not job.followers and not job.done:
+                    # New requests for the key start a fresh job instead of joining a cancelled one
+                    with job._cond:
+                        job.cancelled = True
+                    if self._jobs.get(key) is job:
+                        del self._jobs[key]
+
+    def _finished(self, job):
+        with self._lock:
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+
+
+def client_id(request):
+    """
+    Who a Gradio request comes from: the browser session, else the client address. Users behind
+    one proxy, NAT or localhost share an address, so keying on it would make them share one cap.
+    """
+    session = getattr(request, "session_hash", None)
+    if session:
+        return session
+    client = getattr(request, "client", None)
+    return getattr(client, "host", None) or "local"
@@ -0,0 +1,70 @@
+'''
+utils/tokens.py
+Token estimates and a context budget for packing scraped text into a prompt.
+'''
+
+import re
+
+# Sections smaller than this are not worth fetching or sending
+MIN_SECTION_TOKENS = 50
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English with BPE tokenizers)."""
+    return (len(text) + 3) // 4
+
+
+def _normalize(line):
+    return re.sub(r"\s+", " ", line).strip().lower()
+
+
+class ContentBudget:
+    """
+    Tracks how much of a token budget has been spent on prompt content.
+
+    take() drops lines already seen in earlier text (repeated nav, footer and cookie blocks) before
+    they count against the budget, then keeps whole lines until the section limit or the overall
+    budget is reached.
+    """
+
+    def __init__(self, max_tokens):
+        self.max_tokens = max_tokens
+        self.used = 0
+        self.duplicate_lines = 0
+        self._seen = set()
+
+    @property
+    def remaining(self):
+        return max(0, self.max_tokens - self.used)
+
+    @property
+    def full(self):
+        return self.remaining < MIN_SECTION_TOKENS
+
+    def charge(self, text):
+        self.used += estimate_tokens(text)
+
+    def take(self, text, limit=None):
+        limit = self.remaining if limit is None else min(limit, self.remaining)
+        kept = []
+        spent = 0
+        for line in text.splitlines():
+            key = _normalize(line)
+            if not key:
+                continue
+            if key in self._seen:
+                self.duplicate_lines += 1
+                continue
+            cost = estimate_tokens(line) + 1  # +1 for the newline
+            if spent + cost > limit:
+                # Keep the head of a long paragraph rather than nothing at all
+                room = (limit - spent - 1) * 4
+                if room >= MIN_SECTION_TOKENS * 4:
+                    kept.append(line[:room])
+                    spent = limit
+                break
+            self._seen.add(key)
+            kept.append(line)
+            spent += cost
+        self.used += spent
+        return "\n".join(kept)
@@ -0,0 +1,347 @@
+'''
+utils/tracing.py
+Lightweight spans, metrics and per-request timelines for the apps.
+
+Tracing is off unless TRACING=1 is set in the environment (or enable() is called). While it is
+off, span() returns one shared no-op object and start_trace() a no-op trace, so instrumented code
+pays a single global check.
+
+While it is on:
+- every span's duration goes into a histogram per span name, and failed spans are counted;
+- LLM streams record time to first token, token counts, and the load, prompt-eval and eval
+  durations Ollama reports;
+- spans finished while a Trace is active are also kept in that request's timeline, which is
+  written as JSON to TRACE_DIR (if set) when the request finishes;
+- serve_metrics() exposes the aggregates in Prometheus text format on /metrics.
+
+Apps call init_from_env() at startup, which also starts the metrics endpoint on METRICS_PORT.
+'''
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "llm_app_"
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RATE_BUCKETS = (1, 5, 10, 20, 50, 100, 200, 500, 1000)
+METRICS_PORT = 9464
+
+# Ollama reports durations in nanoseconds in the final chunk of every answer
+OLLAMA_STATS = ("total_duration", "load_duration", "prompt_eval_count", "prompt_eval_duration",
+                "eval_count", "eval_duration")
+
+HELP = {
+    "span_seconds": "Duration of instrumented pipeline stages.",
+    "span_errors_total": "Instrumented stages that raised.",
+    "request_seconds": "Duration of traced requests.",
+    "ttft_seconds": "Time from sending an LLM request to its first token.",
+    "tokens_total": "Tokens processed by LLM calls.",
+    "generation_tokens_per_second": "Generation speed of LLM answers.",
+    "ollama_load_seconds": "Model load time reported by Ollama.",
+    "ollama_prompt_eval_seconds": "Prompt processing time reported by Ollama.",
+    "ollama_eval_seconds": "Generation time reported by Ollama.",
+    "route_decisions_total": "Routed chat questions by route, shown model and switch.",
+    "stage_wait_seconds": "Time jobs waited for a slot in a serving stage.",
+    "jobs_total": "Requests served, by whether they joined a job already in flight.",
+}
+
+_enabled = os.environ.get("TRACING", "").lower() in ("1", "on", "true")
+_trace_dir = os.environ.get("TRACE_DIR")
+_current = contextvars.ContextVar("trace", default=None)
+_lock = threading.Lock()
+_histograms = {}    # (metric, labels) -> [bucket counts..., sum, count]
+_counters = {}      # (metric, labels) -> value
+_buckets = {}       # metric -> bucket bounds
+
+
+def enable(trace_dir=None):
+    global _enabled, _trace_dir
+    _enabled = True
+    _trace_dir = trace_dir or _trace_dir
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+# Metrics
+
+def observe(metric, value, buckets=SECONDS_BUCKETS, **labels):
+    """Add value to the histogram metric{labels}."""
+    key = (metric, tuple(sorted(labels.items())))
+    with _lock:
+        _buckets.setdefault(metric, buckets)
+        counts = _histograms.get(key)
+        if counts is None:
+            counts = _histograms[key] = [0] * (len(buckets) + 2)
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+
+def increment(metric, value=1, **labels):
+    key = (metric, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def _labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        histograms = {key: list(counts) for key, counts in _histograms.items()}
+        counters = dict(_counters)
+        buckets = dict(_buckets)
+
+    for metric in sorted({metric for metric, _ in histograms}):
+        name = PREFIX + metric
+        lines += [f"# HELP {name} {HELP.get(metric, metric)}", f"# TYPE {name} histogram"]
+        for (m, labels), counts in sorted(histograms.items()):
+            if m != metric:
+                continue
+            for bound, count in zip(buckets[metric], counts):
+                lines.append(f"{name}_bucket{_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{_labels(labels, [('le', '+Inf')])} {counts[-1]}")
+            lines.append(f"{name}_sum{_labels(labels)} {counts[-2]}")
+            lines.append(f"{name}_count{_labels(labels)} {counts[-1]}")
+
+    for metric in sorted({metric for metric, _ in counters}):
+        name = PREFIX + metric
+        lines += [f"# HELP {name} {HELP.get(metric, metric)}", f"# TYPE {name} counter"]
+        for (m, labels), value in sorted(counters.items()):
+            if m == metric:
+                lines.append(f"{name}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+# Spans and traces
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "trace")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.trace = _current.get()
+        self.start = time.perf_counter()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self, error=None):
+        duration = time.perf_counter() - self.start
+        observe("span_seconds", duration, span=self.name)
+        if error is not None:
+            increment("span_errors_total", span=self.name)
+            self.attrs["error"] = repr(error)
+        if self.trace is not None:
+            self.trace.add(self, duration)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end(exc)
+        return False
+
+
+class _NoopSpan:
+    def set(self, **attrs):
+        pass
+
+    def end(self, error=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name, **attrs):
+    """Context manager timing one stage; set() on it adds attributes such as sizes or statuses."""
+    return Span(name, attrs) if _enabled else _NOOP_SPAN
+
+
+class Trace:
+    """Timeline of the spans of one request."""
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.id = uuid.uuid4().hex[:12]
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span, duration):
+        record = {
+            "name": span.name,
+            "start": round(span.start - self.start, 6),
+            "duration": round(duration, 6),
+            "thread": threading.current_thread().name,
+            **span.attrs,
+        }
+        with self._lock:
+            self.spans.append(record)
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Attach spans started in this block (and in fetch_all workers it starts) to the trace."""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def to_dict(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start"])
+        return {"id": self.id, "name": self.name, "started_at": self.started_at,
+                "duration": round(time.perf_counter() - self.start, 6), **self.attrs, "spans": spans}
+
+    def finish(self):
+        """Record the request duration and write the timeline to TRACE_DIR if set."""
+        timeline = self.to_dict()
+        observe("request_seconds", timeline["duration"], request=self.name)
+        if _trace_dir:
+            try:
+                os.makedirs(_trace_dir, exist_ok=True)
+                stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+                with open(os.path.join(_trace_dir, f"{stamp}-{self.name}-{self.id}.json"), "w", encoding="utf-8") as f:
+                    json.dump(timeline, f, indent=2, default=str)
+            except OSError as e:
+                logging.warning(f"Could not write trace {self.id}: {e}")
+        return timeline
+
+
+class _NoopTrace:
+    def activate(self):
+        return contextlib.nullcontext(self)
+
+    def finish(self):
+        return None
+
+
+_NOOP_TRACE = _NoopTrace()
+
+
+def start_trace(name, **attrs):
+    """
+    Start a per-request timeline. Use `with trace.activate():` around the blocking parts of the
+    request (not across generator yields) and call finish() at the end.
+    """
+    return Trace(name, attrs) if _enabled else _NOOP_TRACE
+
+
+# LLM calls
+
+def record_llm(backend, model, ttft=None, tokens=0, stats=None):
+    """Metrics for one finished LLM answer; stats holds the OLLAMA_STATS the server reported."""
+    stats = stats or {}
+    if ttft is not None:
+        observe("ttft_seconds", ttft, backend=backend, model=model)
+    completion = stats.get("eval_count") or tokens
+    if completion:
+        increment("tokens_total", completion, backend=backend, model=model, kind="completion")
+    if stats.get("prompt_eval_count"):
+        increment("tokens_total", stats["prompt_eval_count"], backend=backend, model=model, kind="prompt")
+    for key, metric in (("load_duration", "ollama_load_seconds"),
+                        ("prompt_eval_duration", "ollama_prompt_eval_seconds"),
+                        ("eval_duration", "ollama_eval_seconds")):
+        if stats.get(key):
+            observe(metric, stats[key] / 1e9, model=model)
+    if stats.get("eval_count") and stats.get("eval_duration"):
+        observe("generation_tokens_per_second", stats["eval_count"] / (stats["eval_duration"] / 1e9),
+                buckets=RATE_BUCKETS, backend=backend, model=model)
+
+
+def ollama_chat(model, messages, client=None, **kwargs):
+    """
+    ollama.chat (or client.chat) for a full answer, inside an "ollama.chat" span. Like the
+    streaming client it sends keep_alive, so the model stays loaded between requests.
+    """
+    import ollama
+
+    from utils.llm_client import KEEP_ALIVE
+    kwargs.setdefault("keep_alive", KEEP_ALIVE)
+    with span("ollama.chat", model=model) as s:
+        response = (client or ollama).chat(model=model, messages=messages, **kwargs)
+        if _enabled:
+            stats = {key: response.get(key) for key in OLLAMA_STATS if response.get(key) is not None}
+            s.set(**stats)
+            record_llm("ollama", model, stats=stats)
+    return response
+
+
+# Prometheus endpoint
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_metrics(port=METRICS_PORT, host="127.0.0.1"):
+    """Serve /metrics on a daemon thread and return the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+def init_from_env():
+    """Start the metrics endpoint on METRICS_PORT if TRACING is on; returns the server or None."""
+    if not _enabled:
+        return None
+    port = int(os.environ.get("METRICS_PORT", METRICS_PORT))
+    try:
+        server = serve_metrics(port)
+    except OSError as e:
+        logging.warning(f"Could not serve metrics on port {port}: {e}")
+        return None
+    logging.warning(f"Tracing on: metrics at http://127.0.0.1:{port}/metrics"
+                    + (f", timelines in {_trace_dir}" if _trace_dir else ""))
+    return server
@@ -0,0 +1,103 @@
+'''
+utils/vision_session.py
+Multi-turn, multi-image conversation state for vision chat.
+
+Each attached image is numbered and travels with the user message it was attached to. Ollama's
+chat API is stateless, so there is no way to reference an image uploaded in an earlier request;
+instead request_messages() resends only the newest images that fit the image budget
+(max_images and max_image_bytes) and replaces older ones with a short text note. The text of
+the whole conversation is always kept, so the model still sees what was said about them.
+'''
+
+import os
+import threading
+
+from utils.images import prepare_image
+
+MAX_IMAGES_PER_REQUEST = 3
+MAX_IMAGE_BYTES_PER_REQUEST = 1024 * 1024  # base64 payload bytes
+
+
+class VisionSession:
+    def __init__(self, max_images=MAX_IMAGES_PER_REQUEST, max_image_bytes=MAX_IMAGE_BYTES_PER_REQUEST):
+        self.max_images = max_images
+        self.max_image_bytes = max_image_bytes
+        self.images = []    # (number, name, path)
+        self.turns = []     # {"role", "content", "image_numbers"}
+        self._pending = []  # image numbers attached since the last question
+        self._lock = threading.Lock()
+
+    def attach(self, path):
+        """
+        Attach an image to the next question and return its number.
+
+        Preprocessing happens through prepare_image's cache when a request is built; callers can
+        warm it in the background right after attaching.
+        """
+        with self._lock:
+            number = len(self.images) + 1
+            self.images.append((number, os.path.basename(path), path))
+            self._pending.append(number)
+        return number
+
+    def ask(self, question):
+        """Record a user question and return the messages to send for it."""
+        with self._lock:
+            self.turns.append({"role": "user", "content": question, "image_numbers": self._pending})
+            self._pending = []
+            return self._request_messages()
+
+    def drop_question(self):
+        """Remove the unanswered question ask() recorded, e.g. after the request failed."""
+        with self._lock:
+            if self.turns and self.turns[-1]["role"] == "user":
+                # Its images go with the next question instead
+                self._pending = self.turns.pop()["image_numbers"] + self._pending
+
+    def add_answer(self, answer):
+        with self._lock:
+            # The session may have been cleared while the answer streamed in
+            if not self.turns or self.turns[-1]["role"] != "user":
+                return
+            self.turns.append({"role": "assistant", "content": answer, "image_numbers": []})
+
+    def clear(self):
+        with self._lock:
+            self.images = []
+            self.turns = []
+            self._pending = []
+
+    # Called with the lock held
+    def _request_messages(self):
+        by_number = {number: (name, prepare_image(path)) for number, name, path in self.images}
+
+        # Newest images win the budget
+        sent = set()
+        used_bytes = 0
+        for turn in reversed(self.turns):
+            for number in reversed(turn["image_numbers"]):
+                size = by_number[number][1].payload_bytes
+                # The newest image is always sent, even if it alone exceeds the byte budget
+                fits = used_bytes + size <= self.max_image_bytes or not sent
+                if len(sent) < self.max_images and fits:
+                    sent.add(number)
+                    used_bytes += size
+
+        messages = []
+        for turn in self.turns:
+            message = {"role": turn["role"], "content": turn["content"]}
+            if turn["image_numbers"]:
+                labels = []
+                payloads = []
+                for number in turn["image_numbers"]:
+                    name = by_number[number][0]
+                    if number in sent:
+                        labels.append(f"[Image {number}: {name}]")
+                        payloads.append(by_number[number][1].payload)
+                    else:
+                        labels.append(f"[Image {number}: {name} was shown earlier and is not attached again]")
+                message["content"] = " ".join(labels) + "\n" + turn["content"]
+                if payloads:
+                    message["images"] = payloads
+            messages.append(message)
+        return messages